@@ -1,6 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
-from .models import User, StudentProfile, TeacherProfile, Course, Enrollment
+from django.utils import timezone
+from .models import User, StudentProfile, TeacherProfile, Course, Enrollment, OutboundEmail, ScheduleSlot
+from .utils.encryption import decrypt_many
+from .utils.prerequisites import validate_prerequisites
+from .utils.schedule import parse_schedule
+from .utils.thumbnails import thumbnail_url
+from .utils.student_import import OPTIONAL_COLUMNS, REQUIRED_COLUMNS, import_students_file
 
 
 @admin.register(User)
@@ -10,6 +20,49 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('username', 'email')
 
 
+MAX_IMPORT_UPLOAD_MB = 1
+# Each password takes about half a second to hash inside the request, which gunicorn
+# kills after GUNICORN_TIMEOUT (30 s by default)
+MAX_IMPORT_PASSWORD_ROWS = 20
+
+
+class StudentImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="CSV file",
+        help_text=f"Up to {MAX_IMPORT_UPLOAD_MB} MB and {MAX_IMPORT_PASSWORD_ROWS} rows with a password.",
+    )
+    dry_run = forms.BooleanField(required=False, help_text="Validate the file without creating anyone.")
+
+    def clean_csv_file(self):
+        # Larger cohorts go through the command, which is not bound by the request timeout
+        csv_file = self.cleaned_data['csv_file']
+        if csv_file.size > MAX_IMPORT_UPLOAD_MB * 1024 * 1024:
+            raise forms.ValidationError(
+                f"Files over {MAX_IMPORT_UPLOAD_MB} MB must be imported with `manage.py import_students`."
+            )
+        return csv_file
+
+
+def _document_preview(file):
+    # Only the small thumbnail is embedded, so a changelist page stays light
+    if not file:
+        return "No file"
+    thumb = thumbnail_url(file, 'small')
+    if thumb:
+        return format_html('<a href="{}" target="_blank"><img src="{}" width="100" /></a>', file.url, thumb)
+    label = "View PDF" if file.name.lower().endswith('.pdf') else "View file"
+    return format_html('<a href="{}" target="_blank">{}</a>', file.url, label)
+
+
+class StudentProfileChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Decrypt the whole page in one pass instead of once per row from list_display
+        addresses = decrypt_many([obj.address_encrypted for obj in self.result_list], default="[Decryption Error]")
+        for obj, address in zip(self.result_list, addresses):
+            obj.decrypted_address = address
+
+
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = (
@@ -20,23 +73,49 @@ class StudentProfileAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('decrypted_address', 'transcript_preview', 'id_proof_preview')
 
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_csv), name='MainApp_studentprofile_import'),
+        ] + super().get_urls()
+
+    def import_csv(self, request):
+        if not self.has_add_permission(request):
+            return self.admin_site.login(request)
+        report = None
+        form = StudentImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                report = import_students_file(
+                    form.cleaned_data['csv_file'], max_password_rows=MAX_IMPORT_PASSWORD_ROWS,
+                    dry_run=form.cleaned_data['dry_run'],
+                )
+            except (UnicodeDecodeError, ValueError) as exc:
+                form.add_error('csv_file', str(exc))
+            else:
+                verb = "would be created" if form.cleaned_data['dry_run'] else "created"
+                messages.success(request, f"{report.created} student(s) {verb}; {len(report.errors)} row(s) rejected.")
+        return TemplateResponse(request, 'admin/MainApp/studentprofile/import_csv.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import students from CSV",
+            'form': form,
+            'report': report,
+            'required_columns': REQUIRED_COLUMNS,
+            'optional_columns': OPTIONAL_COLUMNS,
+        })
+
+    def get_changelist(self, request, **kwargs):
+        return StudentProfileChangeList
+
     def decrypted_address(self, obj):
-        return obj.get_decrypted_address()
+        return getattr(obj, 'decrypted_address', None) or obj.get_decrypted_address()
     decrypted_address.short_description = "Address"
 
     def transcript_preview(self, obj):
-        if obj.transcript and obj.transcript.url.endswith('.pdf'):
-            return format_html('<a href="{}" target="_blank">View PDF</a>', obj.transcript.url)
-        elif obj.transcript:
-            return format_html('<img src="{}" width="100" />', obj.transcript.url)
-        return "No file"
+        return _document_preview(obj.transcript)
 
     def id_proof_preview(self, obj):
-        if obj.id_proof and obj.id_proof.url.endswith('.pdf'):
-            return format_html('<a href="{}" target="_blank">View PDF</a>', obj.id_proof.url)
-        elif obj.id_proof:
-            return format_html('<img src="{}" width="100" />', obj.id_proof.url)
-        return "No file"
+        return _document_preview(obj.id_proof)
 
 
 @admin.register(TeacherProfile)
@@ -49,9 +128,42 @@ class TeacherProfileAdmin(admin.ModelAdmin):
     list_filter = ('department',)
 
 
+class CourseAdminForm(forms.ModelForm):
+    class Meta:
+        model = Course
+        fields = '__all__'
+
+    def clean_prerequisites(self):
+        prerequisites = self.cleaned_data['prerequisites']
+        validate_prerequisites(self.instance.pk, [course.pk for course in prerequisites])
+        return prerequisites
+
+    def clean_schedule(self):
+        schedule = self.cleaned_data['schedule']
+        try:
+            parse_schedule(schedule)
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+        return schedule
+
+
+class ScheduleSlotInline(admin.TabularInline):
+    # Derived from Course.schedule on save; shown so parsing problems are visible
+    model = ScheduleSlot
+    fields = ('weekday', 'start_time', 'end_time')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ('code', 'name', 'teacher', 'capacity')
+    form = CourseAdminForm
+    inlines = [ScheduleSlotInline]
+    list_display = ('code', 'name', 'teacher', 'capacity', 'approved_count')
     search_fields = ('code', 'name')
     list_filter = ('teacher',)
     filter_horizontal = ('prerequisites',)
@@ -61,4 +173,18 @@ class CourseAdmin(admin.ModelAdmin):
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('student', 'course', 'status', 'requested_at', 'reviewed_by')
     search_fields = ('student__username', 'course__code')
-    list_filter = ('status', 'course')
\ No newline at end of file
+    list_filter = ('status', 'course')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    search_fields = ('recipient', 'subject')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected emails")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} email(s) requeued.")
\ No newline at end of file
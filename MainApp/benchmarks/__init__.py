@@ -0,0 +1,6 @@
+"""
+Synthetic data seeding and view-level benchmarks.
+
+    python manage.py seed_benchmark_data --students 5000
+    python manage.py run_benchmarks --output results.json --baseline baseline.json
+"""
@@ -0,0 +1,126 @@
+import statistics
+import time
+from itertools import count
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+
+from MainApp.benchmarks.seed import PREFIX
+from MainApp.models import Course, User
+
+# url name -> (role to log in as, or None for anonymous; callable returning reverse() kwargs)
+VIEWS = {
+    'home': (None, None),
+    'login': (None, None),
+    'register_student': (None, None),
+    'register_teacher': (None, None),
+    'password_reset': (None, None),
+    'password_reset_done': (None, None),
+    'password_reset_complete': (None, None),
+    'dashboard': ('student', None),
+    'edit_profile': ('student', None),
+    'view_transcript': ('student', None),
+    'course_list': ('student', None),
+    'course_detail': ('student', lambda ctx: {'course_id': ctx['course'].id}),
+    'student_schedule': ('student', None),
+    'admin_enrollment_requests': ('admin', None),
+    'enrollment_export': ('admin', lambda ctx: {'fmt': 'csv'}),
+    'db_pool_metrics': ('admin', None),
+    'teacher_dashboard': ('teacher', None),
+    'teacher_courses': ('teacher', None),
+    'teacher_pending_enrollments': ('teacher', None),
+    'teacher_course_students': ('teacher', lambda ctx: {'course_id': ctx['course'].id}),
+    'teacher_course_students_export': ('teacher', lambda ctx: {'course_id': ctx['course'].id, 'fmt': 'csv'}),
+}
+# Routes that mutate state, need one-time tokens or serve uploaded files are not driven
+SKIPPED = {'logout', 'password_reset_confirm', 'bulk_enrollment_decision', 'protected_media'}
+
+
+def url_names():
+    return [p.name for p in get_resolver().url_patterns if isinstance(p, URLPattern) and p.name]
+
+
+def unbenchmarked_urls():
+    """Named project URLs that have neither a VIEWS entry nor a SKIPPED entry."""
+    return sorted(set(url_names()) - set(VIEWS) - SKIPPED)
+
+
+def _context():
+    student = User.objects.filter(role='student', username__startswith=PREFIX).order_by('pk').first()
+    teacher = User.objects.filter(role='teacher', username__startswith=PREFIX, courses__isnull=False).order_by('pk').first()
+    admin = User.objects.filter(role='admin').order_by('pk').first()
+    if admin is None:
+        admin, _ = User.objects.get_or_create(username=f'{PREFIX}admin', defaults={'role': 'admin'})
+    if not (student and teacher):
+        raise LookupError("No seeded data found; run seed_benchmark_data first.")
+    return {
+        'student': student,
+        'teacher': teacher,
+        'admin': admin,
+        'course': Course.objects.filter(teacher=teacher).order_by('pk').first(),
+    }
+
+
+def run(iterations=20, warmup=2, names=None):
+    """
+    Drive each view through the test client. Returns {url name: metrics} with latency
+    percentiles in milliseconds, the query count and the response size in bytes.
+    """
+    ctx = _context()
+    # The test client's default 'testserver' host is rejected by ALLOWED_HOSTS outside tests
+    host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')), 'localhost')
+    clients = {None: Client(HTTP_HOST=host)}
+    for role in ('student', 'teacher', 'admin'):
+        clients[role] = Client(HTTP_HOST=host)
+        clients[role].force_login(ctx[role])
+    # A fresh address per request keeps the per-IP rate limits out of the measurements
+    addresses = (f'10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}' for n in count(1))
+
+    results = {}
+    for name, (role, kwargs) in VIEWS.items():
+        if names and name not in names:
+            continue
+        url = reverse(name, kwargs=kwargs(ctx) if kwargs else None)
+        client = clients[role]
+        timings, queries, size, status = [], 0, 0, None
+        for i in range(warmup + iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, secure=True, REMOTE_ADDR=next(addresses))
+                body = b''.join(response) if response.streaming else response.content
+                elapsed = time.perf_counter() - started
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries, size, status = len(captured), len(body), response.status_code
+        results[name] = _summarize(timings, queries=queries, bytes=size, status=status, url=url)
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Rows of (name, metric, baseline, current, relative change) where a view got slower or
+    issued more queries than ``baseline`` by more than ``threshold`` (0.2 = 20%).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries'):
+            before, after = previous.get(metric), current.get(metric)
+            if before and after is not None and (after - before) / before > threshold:
+                regressions.append((name, metric, before, after, (after - before) / before))
+    return regressions
+
+
+def _summarize(timings, **extra):
+    timings = sorted(timings)
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[max(int(round(len(timings) * 0.95)) - 1, 0)], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        **extra,
+    }
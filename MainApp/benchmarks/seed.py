@@ -0,0 +1,101 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from MainApp.models import Course, Enrollment, ScheduleSlot, StudentProfile, TeacherProfile, User
+from MainApp.utils.encryption import encrypt_text
+from MainApp.utils.enrollment import approved_count_expression
+from MainApp.utils.prerequisites import rebuild_closure
+from MainApp.utils.schedule import parse_schedule
+from MainApp.utils.search import rebuild_index
+
+PREFIX = 'bench-'
+PASSWORD = 'bench-password-123'
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri')
+STATUS_WEIGHTS = (('approved', 6), ('pending', 3), ('denied', 1))
+
+
+def clear():
+    """Delete everything created by seed(); profiles and enrollments cascade."""
+    with transaction.atomic():
+        Course.objects.filter(code__startswith=PREFIX.upper()).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+
+def seed(students=1000, teachers=50, courses=200, chain_length=4, enrollments_per_student=5,
+         batch_size=1000, random_seed=0):
+    """
+    Bulk-create a synthetic dataset. Courses form prerequisite chains of ``chain_length``;
+    each student requests ``enrollments_per_student`` random courses.
+    Returns a dict of row counts.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(PASSWORD)  # hash once; every seeded user shares it
+    with transaction.atomic():
+        teacher_users = User.objects.bulk_create(
+            (User(username=f'{PREFIX}teacher-{i}', email=f'{PREFIX}teacher-{i}@example.com',
+                  role='teacher', password=password) for i in range(teachers)),
+            batch_size=batch_size,
+        )
+        TeacherProfile.objects.bulk_create(
+            (TeacherProfile(user=user, full_name=f'Teacher {i}', department=f'Department {i % 10}',
+                            contact_email=user.email) for i, user in enumerate(teacher_users)),
+            batch_size=batch_size,
+        )
+        student_users = User.objects.bulk_create(
+            (User(username=f'{PREFIX}student-{i}', email=f'{PREFIX}student-{i}@example.com',
+                  role='student', password=password) for i in range(students)),
+            batch_size=batch_size,
+        )
+        address = encrypt_text('1 Benchmark Road')
+        StudentProfile.objects.bulk_create(
+            (StudentProfile(user=user, full_name=f'Student {i}', age=18 + i % 10, contact_number='555-0100',
+                            address_encrypted=address, guardian_email=f'guardian-{i}@example.com')
+             for i, user in enumerate(student_users)),
+            batch_size=batch_size,
+        )
+        course_rows = Course.objects.bulk_create(
+            (Course(code=f'{PREFIX.upper()}{i:05}', name=f'Benchmark Course {i}',
+                    description=f'Synthetic course {i} for load testing.',
+                    teacher=teacher_users[i % teachers] if teachers else None,
+                    schedule=_schedule(rng), capacity=rng.randint(20, 200))
+             for i in range(courses)),
+            batch_size=batch_size,
+        )
+        Through = Course.prerequisites.through
+        Through.objects.bulk_create(
+            (Through(from_course_id=course.id, to_course_id=course_rows[i - 1].id)
+             for i, course in enumerate(course_rows) if chain_length and i % chain_length),
+            batch_size=batch_size,
+        )
+        statuses = [status for status, weight in STATUS_WEIGHTS for _ in range(weight)]
+        per_student = min(enrollments_per_student, courses)
+        Enrollment.objects.bulk_create(
+            (Enrollment(student=student, course=course, status=rng.choice(statuses))
+             for student in student_users
+             for course in rng.sample(course_rows, per_student)),
+            batch_size=batch_size,
+        )
+        # bulk_create bypasses save() and signals, so derived data is rebuilt in bulk
+        course_ids = [course.id for course in course_rows]
+        Course.objects.filter(id__in=course_ids).update(approved_count=approved_count_expression())
+        rebuild_closure(course_ids)
+        ScheduleSlot.objects.bulk_create(
+            (ScheduleSlot(course=course, weekday=weekday, start_time=start, end_time=end)
+             for course in course_rows for weekday, start, end in parse_schedule(course.schedule)),
+            batch_size=batch_size,
+        )
+    rebuild_index(batch_size=batch_size)
+    return {
+        'teachers': teachers,
+        'students': students,
+        'courses': courses,
+        'enrollments': students * per_student,
+    }
+
+
+def _schedule(rng):
+    days = rng.sample(DAYS, 2)
+    start = rng.randint(8, 16)
+    return ', '.join(f'{day} {start}-{start + 2}' for day in sorted(days, key=DAYS.index))
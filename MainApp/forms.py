@@ -1,18 +1,33 @@
-import bleach
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.contrib.auth.forms import UserCreationForm
-from .models import User, StudentProfile, TeacherProfile
+from .models import User, StudentProfile, TeacherProfile, Course, Enrollment
+from .storage import sniff_file
 from .utils.encryption import encrypt_text, decrypt_text
+from .utils.sanitize import sanitize_fields
 
 ALLOWED_FILE_TYPES = ['application/pdf', 'image/jpeg', 'image/png']
 MAX_FILE_SIZE_MB = 5
 
 
+class SanitizedFieldsMixin:
+    # Sanitized once after field validation. Addresses are left to StudentProfile.clean(),
+    # which sanitizes them before encrypting
+    sanitized_fields = ()
+
+    def clean(self):
+        cleaned = super().clean()
+        cleaned.update(sanitize_fields(cleaned, self.sanitized_fields))
+        return cleaned
+
+
 # ----------------------------
 # Student Registration Form
 # ----------------------------
-class StudentRegistrationForm(UserCreationForm):
+class StudentRegistrationForm(SanitizedFieldsMixin, UserCreationForm):
     full_name = forms.CharField(max_length=100)
     age = forms.IntegerField(min_value=1)
     contact_number = forms.CharField(max_length=20)
@@ -21,25 +36,15 @@ class StudentRegistrationForm(UserCreationForm):
     transcript = forms.FileField(required=False)
     id_proof = forms.FileField(required=False)
 
+    sanitized_fields = ('full_name', 'contact_number', 'guardian_email')
+
     class Meta:
         model = User
         fields = ['username', 'email', 'password1', 'password2']
 
-    def clean_full_name(self):
-        return bleach.clean(self.cleaned_data['full_name'])
-
-    def clean_contact_number(self):
-        return bleach.clean(self.cleaned_data['contact_number'])
-
-    def clean_address(self):
-        return bleach.clean(self.cleaned_data['address'])
-
-    def clean_guardian_email(self):
-        return bleach.clean(self.cleaned_data['guardian_email'])
-
     def validate_file(self, file, label):
         if file:
-            if file.content_type not in ALLOWED_FILE_TYPES:
+            if sniff_file(file) not in ALLOWED_FILE_TYPES:
                 raise ValidationError(f"Invalid file type for {label}. Only PDF, JPG, and PNG are allowed.")
             if file.size > MAX_FILE_SIZE_MB * 1024 * 1024:
                 raise ValidationError(f"{label} exceeds the {MAX_FILE_SIZE_MB}MB size limit.")
@@ -73,32 +78,19 @@ class StudentRegistrationForm(UserCreationForm):
 # ----------------------------
 # Teacher Registration Form
 # ----------------------------
-class TeacherRegistrationForm(UserCreationForm):
+class TeacherRegistrationForm(SanitizedFieldsMixin, UserCreationForm):
     full_name = forms.CharField(max_length=100)
     department = forms.CharField(max_length=100)
     contact_email = forms.EmailField()
     office_location = forms.CharField(max_length=100, required=False)
     bio = forms.CharField(widget=forms.Textarea, required=False)
 
+    sanitized_fields = ('full_name', 'department', 'contact_email', 'office_location', 'bio')
+
     class Meta:
         model = User
         fields = ['username', 'email', 'password1', 'password2']
 
-    def clean_full_name(self):
-        return bleach.clean(self.cleaned_data['full_name'])
-
-    def clean_department(self):
-        return bleach.clean(self.cleaned_data['department'])
-
-    def clean_contact_email(self):
-        return bleach.clean(self.cleaned_data['contact_email'])
-
-    def clean_office_location(self):
-        return bleach.clean(self.cleaned_data['office_location'])
-
-    def clean_bio(self):
-        return bleach.clean(self.cleaned_data['bio'])
-
     def save(self, commit=True):
         user = super().save(commit=False)
         user.role = 'teacher'
@@ -114,12 +106,14 @@ class TeacherRegistrationForm(UserCreationForm):
             )
         return user
 
-class StudentProfileForm(forms.ModelForm):
+class StudentProfileForm(SanitizedFieldsMixin, forms.ModelForm):
     address = forms.CharField(widget=forms.Textarea)
     profile_picture = forms.ImageField(required=False)
     transcript = forms.FileField(required=False)
     id_proof = forms.FileField(required=False)
 
+    sanitized_fields = ('full_name', 'contact_number', 'guardian_email')
+
     class Meta:
         model = StudentProfile
         fields = ['full_name', 'age', 'contact_number', 'guardian_email', 'address', 'transcript', 'id_proof', 'profile_picture']
@@ -131,27 +125,55 @@ class StudentProfileForm(forms.ModelForm):
             initial['address'] = decrypt_text(instance.address_encrypted)
         super().__init__(*args, **kwargs)
 
-    def clean_address(self):
-        return bleach.clean(self.cleaned_data['address'])
-
     def save(self, commit=True):
         instance = super().save(commit=False)
-        instance.address_encrypted = encrypt_text(self.cleaned_data['address'])
+        # Re-encrypting an unchanged address would still produce a new ciphertext to write
+        if 'address' in self.changed_data:
+            instance.address_encrypted = encrypt_text(self.cleaned_data['address'])
         if commit:
             instance.save()
         return instance
 
 
-class TeacherProfileForm(forms.ModelForm):
+class TeacherProfileForm(SanitizedFieldsMixin, forms.ModelForm):
     profile_picture = forms.ImageField(required=False)
 
+    sanitized_fields = ('full_name', 'department', 'contact_email', 'office_location', 'bio')
+
     class Meta:
         model = TeacherProfile
         fields = ['full_name', 'department', 'contact_email', 'office_location', 'bio', 'profile_picture']
 
+
+# ----------------------------
+# Enrollment Export Filters
+# ----------------------------
+class EnrollmentExportForm(forms.Form):
+    course = forms.ModelChoiceField(queryset=Course.objects.order_by('code'), required=False, empty_label="All courses")
+    status = forms.ChoiceField(choices=[('', "Any status")] + Enrollment.STATUS_CHOICES, required=False)
+    requested_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    requested_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
     def clean(self):
         cleaned = super().clean()
-        for field in ['full_name', 'department', 'contact_email', 'office_location', 'bio']:
-            if field in cleaned:
-                cleaned[field] = bleach.clean(cleaned[field])
-        return cleaned
\ No newline at end of file
+        start, end = cleaned.get('requested_from'), cleaned.get('requested_to')
+        if start and end and start > end:
+            raise ValidationError("The start date must not be after the end date.")
+        return cleaned
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data.get('course'):
+            queryset = queryset.filter(course=data['course'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        # Dates are whole local days; bound the timestamps so requested_at stays index-friendly
+        if data.get('requested_from'):
+            queryset = queryset.filter(requested_at__gte=_start_of_day(data['requested_from']))
+        if data.get('requested_to'):
+            queryset = queryset.filter(requested_at__lt=_start_of_day(data['requested_to'] + timedelta(days=1)))
+        return queryset
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from MainApp.benchmarks.runner import _summarize
+from MainApp.models import Course
+
+ALIAS = 'bench_connections'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database latency against the configured Postgres server with a "
+        "new connection per request, persistent health-checked connections and a psycopg pool. "
+        "Each simulated request opens or reuses a connection, lists courses and is closed the way "
+        "Django's request_finished handler closes it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=5)
+
+    def handle(self, *args, **options):
+        base = connections.settings['default']
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError("Needs the Postgres database (set DB_NAME, DB_USER, DB_PASSWORD and DB_HOST).")
+        options_without_pool = {key: value for key, value in base['OPTIONS'].items() if key != 'pool'}
+        modes = {
+            'new connection': {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': options_without_pool},
+            'persistent': {**base, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': options_without_pool},
+        }
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            self.stderr.write("psycopg_pool is not installed; skipping the pool.")
+        else:
+            pool = {'min_size': 1, 'max_size': 2, 'check': ConnectionPool.check_connection}
+            modes['pool'] = {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': {**options_without_pool, 'pool': pool}}
+
+        self.stdout.write(f"{'mode':<16}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        for label, settings_dict in modes.items():
+            row = self._run(settings_dict, options['requests'], options['warmup'])
+            self.stdout.write(f"{label:<16}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['mean_ms']:>10.2f}")
+
+    def _run(self, settings_dict, requests, warmup):
+        connections.settings[ALIAS] = settings_dict
+        connection = connections[ALIAS]
+        timings = []
+        try:
+            for i in range(warmup + requests):
+                started = time.perf_counter()
+                connection.close_if_unusable_or_obsolete()  # request_started
+                list(Course.objects.using(ALIAS).only('id', 'name', 'code')[:20])
+                connection.close_if_unusable_or_obsolete()  # request_finished
+                if i >= warmup:
+                    timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+            if settings_dict['OPTIONS'].get('pool'):
+                connection.close_pool()
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+        return _summarize(timings)
@@ -0,0 +1,39 @@
+import base64
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from MainApp.utils.encryption import _Key, _decrypt, decrypt_many, decrypt_text, encrypt_text
+
+
+class Command(BaseCommand):
+    help = "Measure address encryption and decryption throughput in memory. Nothing touches the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        addresses = [f'{i} Benchmark Road, Apartment {i % 97}, Springfield' for i in range(rows)]
+
+        encrypted = self._time('encrypt_text', lambda: [encrypt_text(address) for address in addresses], rows)
+        self._time('decrypt_text', lambda: [decrypt_text(value) for value in encrypted], rows)
+        decrypted = self._time('decrypt_many', lambda: decrypt_many(encrypted), rows)
+        if decrypted != addresses:
+            raise CommandError("Decrypted values do not match the originals.")
+        legacy = [base64.b64encode(address.encode()).decode() for address in addresses]
+        self._time('legacy base64', lambda: decrypt_many(legacy), rows)
+        # What decrypting would cost if a cipher were set up for every row
+        self._time('uncached cipher', lambda: [self._uncached(value) for value in encrypted], rows)
+
+    def _uncached(self, value):
+        key = _Key(settings.ENCRYPTION_KEY)
+        return _decrypt(value, {key.id: key})
+
+    def _time(self, label, fn, rows):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:>16}: {elapsed * 1000:8.1f} ms, {rows / elapsed:>10,.0f} rows/s")
+        return result
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from MainApp.models import User, Course, Enrollment
+from MainApp.utils.enrollment import decision_email, review_enrollments
+from MainApp.utils.outbox import queue_email
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare one-at-a-time enrollment review against the bulk decision path. All data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--enrollments', type=int, default=2000)
+        parser.add_argument('--courses', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for label, runner in (('one-at-a-time', self._review_each), ('bulk', self._review_bulk)):
+            try:
+                with transaction.atomic():
+                    admin, ids = self._seed(options['enrollments'], options['courses'])
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        runner(admin, ids)
+                        elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{label:>14}: {len(ids)} decisions in {elapsed:.3f}s "
+                        f"({len(queries)} queries, {elapsed / len(ids) * 1000:.3f} ms/decision)"
+                    )
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _seed(self, n_enrollments, n_courses):
+        password = make_password(None)
+        admin = User.objects.create(username='bench-admin', role='admin', password=password)
+        courses = Course.objects.bulk_create(
+            Course(name=f"Bench course {i}", code=f"BENCH{i}", capacity=n_enrollments) for i in range(n_courses)
+        )
+        students = User.objects.bulk_create(
+            User(username=f"bench-student-{i}", email=f"bench{i}@example.com", role='student', password=password)
+            for i in range(n_enrollments)
+        )
+        enrollments = Enrollment.objects.bulk_create(
+            Enrollment(student=student, course=courses[i % n_courses]) for i, student in enumerate(students)
+        )
+        return admin, [e.id for e in enrollments]
+
+    def _review_each(self, admin, ids):
+        # Mirrors the previous per-POST path: get, save and notify for each request
+        for enrollment_id in ids:
+            enrollment = Enrollment.objects.select_related('student', 'course').get(id=enrollment_id, status='pending')
+            enrollment.status = 'approved'
+            enrollment.reviewed_by = admin
+            enrollment.reviewed_at = timezone.now()
+            enrollment.save()
+            queue_email(*decision_email(enrollment, 'approved', '', 'admin'))
+
+    def _review_bulk(self, admin, ids):
+        review_enrollments(Enrollment.objects.all(), ids, 'approve', admin)
@@ -0,0 +1,66 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from MainApp.utils.logs import BackgroundHandler, JsonFormatter
+
+
+class SlowHandler(logging.Handler):
+    """Stands in for a stalled disk: every write takes ``delay`` seconds."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def emit(self, record):
+        self.format(record)
+        time.sleep(self.delay)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what one logger.warning() call costs the calling (request) thread with a "
+        "direct JSON file handler, the background handler, and the background handler in "
+        "front of a slow disk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=20_000)
+        parser.add_argument('--slow-ms', type=float, default=5.0, help="Per-record delay of the simulated slow disk.")
+
+    def handle(self, *args, **options):
+        records = options['records']
+        with tempfile.TemporaryDirectory() as workdir:
+            direct = logging.FileHandler(os.path.join(workdir, 'direct.log'))
+            direct.setFormatter(JsonFormatter())
+            self._time('FileHandler', direct, records)
+            direct.close()
+
+            file = logging.FileHandler(os.path.join(workdir, 'queued.log'))
+            file.setFormatter(JsonFormatter())
+            self._time('BackgroundHandler', BackgroundHandler(file, records), records)
+            file.close()
+
+            slow = SlowHandler(options['slow_ms'] / 1000)
+            slow.setFormatter(JsonFormatter())
+            background = BackgroundHandler(slow, 1000)
+            # Not stopped: the listener thread is a daemon, and its backlog is abandoned at exit
+            self._time('slow disk, queued', background, records, stop=False)
+            self.stdout.write(f"{'':>20}  {background.dropped} record(s) dropped instead of blocking")
+
+    def _time(self, label, handler, count, stop=True):
+        logger = logging.getLogger(f'bench_logging.{label}')
+        logger.propagate = False
+        logger.handlers = [handler]
+        if isinstance(handler, BackgroundHandler):
+            handler.start()
+        started = time.perf_counter()
+        for i in range(count):
+            logger.warning("Rate limit exceeded on login by IP: %s", f'10.0.{i % 256}.{i % 200}', extra={'ip': i})
+        elapsed = time.perf_counter() - started
+        if stop and isinstance(handler, BackgroundHandler):
+            handler.stop()
+        self.stdout.write(f"{label:>20}: {elapsed * 1000:8.1f} ms, {elapsed / count * 1e6:7.2f} us/record")
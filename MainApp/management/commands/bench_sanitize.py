@@ -0,0 +1,40 @@
+import random
+import time
+
+import bleach
+from django.core.management.base import BaseCommand, CommandError
+
+from MainApp.utils.sanitize import PLAIN, RICH, _cleaner, sanitize_many
+
+SAMPLES = ('Ana Souza', '12 Elm Street, Apt 4', '+1 555 0100', 'guardian@example.com', 'Dept. of Physics')
+MARKUP = ('<b>Ana</b> Souza', 'Tom & Jerry Ltd', '<script>alert(1)</script>', '5 < 6 > 4')
+
+
+class Command(BaseCommand):
+    help = "Compare per-call bleach.clean() with the shared sanitizer on synthetic form values."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--values', type=int, default=20_000)
+        parser.add_argument('--markup-ratio', type=float, default=0.1, help="Share of values containing markup.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        values = [
+            rng.choice(MARKUP if rng.random() < options['markup_ratio'] else SAMPLES) + f' {i}'
+            for i in range(options['values'])
+        ]
+        # bleach.clean() uses bleach's default tags, like the RICH policy
+        expected = self._time('bleach.clean', lambda: [bleach.clean(value) for value in values], len(values))
+        cleaner = _cleaner(RICH)
+        self._time('shared Cleaner', lambda: [cleaner.clean(value) for value in values], len(values))
+        if self._time('sanitize_many', lambda: sanitize_many(values, RICH), len(values)) != expected:
+            raise CommandError("sanitize_many() output differs from bleach.clean().")
+        self._time('sanitize_many plain', lambda: sanitize_many(values, PLAIN), len(values))
+
+    def _time(self, label, fn, count):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:>20}: {elapsed * 1000:8.1f} ms, {elapsed / count * 1e6:7.2f} us/value")
+        return result
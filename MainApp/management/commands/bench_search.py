@@ -0,0 +1,65 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from MainApp.models import SearchDocument
+from MainApp.utils.search import search_ids
+
+WORDS = (
+    'algebra biology calculus chemistry databases economics geometry history linguistics '
+    'mechanics networks optics physics robotics statistics theory writing zoology'
+).split()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare indexed search against icontains scans on synthetic documents. All data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = [f"{rng.choice(WORDS)[:5]} {rng.randrange(options['rows'])}" for _ in range(options['queries'])]
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                SearchDocument.objects.bulk_create(
+                    (SearchDocument(
+                        kind='student', object_id=i,
+                        content=f"student{i} {rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                    ) for i in range(options['rows'])),
+                    batch_size=5000,
+                )
+                self.stdout.write(f"Seeded {options['rows']} documents in {time.perf_counter() - started:.1f}s")
+                self._report('indexed', queries, lambda q: search_ids('student', q, limit=50))
+                self._report('icontains', queries, self._scan)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _scan(self, query):
+        documents = SearchDocument.objects.filter(kind='student')
+        for term in query.split():
+            documents = documents.filter(content__icontains=term)
+        return list(documents.values_list('object_id', flat=True)[:50])
+
+    def _report(self, label, queries, search):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f"{label:>10}: p50 {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms over {len(timings)} queries"
+        )
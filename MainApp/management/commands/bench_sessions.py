@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from MainApp.sessions import SessionStore as CachedStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-request cost of reading and re-saving a signed-in session with the "
+        "database engine and with MainApp.sessions on the SESSION_CACHE_ALIAS cache. Creates "
+        "throwaway sessions and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=10, help="Times every session is read.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Cache: {settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']}")
+        keys = []
+        for i in range(options['sessions']):
+            store = CachedStore()
+            store.update({'_auth_user_id': str(i), '_auth_user_backend': 'bench', '_auth_user_hash': 'x' * 64})
+            store.create()
+            keys.append(store.session_key)
+        try:
+            reads = len(keys) * options['rounds']
+            for label, store_class in (('db', DBStore), ('MainApp.sessions', CachedStore)):
+                # One pass to warm the cache, as a user's earlier requests would have
+                for key in keys:
+                    store_class(key).load()
+                self._time(f'{label} read', reads, lambda: [
+                    store_class(key).load() for _ in range(options['rounds']) for key in keys
+                ])
+                self._time(f'{label} re-save', len(keys), lambda: [self._resave(store_class(key)) for key in keys])
+        finally:
+            for key in keys:
+                CachedStore(key).delete()
+
+    def _resave(self, store):
+        # What a request that touched the session without changing it costs
+        store['_auth_user_backend'] = store['_auth_user_backend']
+        store.save()
+
+    def _time(self, label, count, fn):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label:>24}: {elapsed / count * 1e6:8.1f} us, {len(queries) / count:.2f} queries per request"
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from MainApp.models import Course, Enrollment, User
+from MainApp.utils.pagination import DEFAULT_PER_PAGE
+from MainApp.utils.prerequisites import missing_prerequisites
+from MainApp.utils.schedule import conflicting_slots
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the hot queries behind each view, using sample rows from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help="Run EXPLAIN ANALYZE (PostgreSQL only).")
+
+    def handle(self, *args, **options):
+        if options['analyze'] and connection.vendor != 'postgresql':
+            raise CommandError(f"--analyze needs PostgreSQL; this database is {connection.vendor}.")
+        student = User.objects.filter(role='student').order_by('pk').first()
+        teacher = User.objects.filter(role='teacher', courses__isnull=False).order_by('pk').first()
+        course = Course.objects.order_by('pk').first()
+        if not (student and teacher and course):
+            raise CommandError("Need at least one student, one teacher with a course and one course; try seeding data first.")
+
+        page = DEFAULT_PER_PAGE + 1
+        teacher_courses = Course.objects.filter(teacher=teacher)
+        queries = [
+            ('course_list', Course.objects.select_related('teacher').order_by('code')[:page]),
+            ('course_detail: existing request', Enrollment.objects.filter(student=student, course=course)),
+            ('course_detail: missing prerequisites', missing_prerequisites(student, course)),
+            ('course_detail: schedule conflicts', conflicting_slots(course, Course.objects.filter(
+                enrollments__student=student, enrollments__status__in=['pending', 'approved']))),
+            ('student_schedule', Enrollment.objects.filter(student=student, status='approved').select_related('course')),
+            ('admin_enrollment_requests', Enrollment.objects.filter(status='pending')
+                .select_related('student', 'course').order_by('requested_at', 'id')[:page]),
+            ('teacher_pending_enrollments', Enrollment.objects.filter(course__in=teacher_courses, status='pending')
+                .select_related('student', 'course').order_by('requested_at', 'id')[:page]),
+            ('teacher_course_students', Enrollment.objects.filter(course=course, status='approved')
+                .select_related('student').order_by('id')[:page]),
+        ]
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        for label, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
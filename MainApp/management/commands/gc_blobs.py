@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from MainApp.utils.blobs import adopt_legacy_files, collect_garbage, recount
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored document blobs that no profile references. Run it periodically, e.g. "
+        "daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help="Keep unreferenced blobs this recent; covers uploads whose form is still being saved.",
+        )
+        parser.add_argument('--recount', action='store_true', help="Recompute reference counts from the profiles first.")
+        parser.add_argument(
+            '--adopt-legacy', action='store_true',
+            help="First move documents uploaded before deduplication into the blob store.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be done without changing anything.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if options['adopt_legacy']:
+            moved = adopt_legacy_files(dry_run=dry_run)
+            self.stdout.write(f"{'Would move' if dry_run else 'Moved'} {moved} legacy document(s) into the blob store.")
+        if options['recount'] and not dry_run:
+            self.stdout.write(f"Corrected {recount()} reference count(s).")
+        removed, freed = collect_garbage(timedelta(hours=options['grace_hours']), dry_run=dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would delete' if dry_run else 'Deleted'} {removed} unreferenced blob(s), {freed / 1024 / 1024:.1f} MB."
+        ))
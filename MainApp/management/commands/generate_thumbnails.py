@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from MainApp.models import StudentProfile, TeacherProfile
+from MainApp.utils.thumbnails import THUMBNAIL_FIELDS, generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Create missing thumbnails and document previews, e.g. for files uploaded before "
+        "thumbnails existed or jobs lost in a restart. Existing thumbnails are kept."
+    )
+
+    def handle(self, *args, **options):
+        written = 0
+        for model in (StudentProfile, TeacherProfile):
+            fields = THUMBNAIL_FIELDS[model._meta.model_name]
+            for profile in model.objects.only('pk', *fields).iterator():
+                for field in fields:
+                    file = getattr(profile, field)
+                    if file:
+                        written += generate_thumbnails(file.storage, file.name)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} thumbnail(s)."))
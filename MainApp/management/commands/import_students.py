@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from MainApp.utils.student_import import DEFAULT_CHUNK_SIZE, REQUIRED_COLUMNS, import_students
+
+
+class Command(BaseCommand):
+    help = (
+        f"Bulk-create students from a CSV with columns {', '.join(REQUIRED_COLUMNS)} "
+        "and optionally email and password. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path to the CSV file, or - for stdin.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per transaction.")
+        parser.add_argument('--processes', type=int, default=None, help="Password hashing processes (default: CPU count; 0 hashes in this process).")
+        parser.add_argument('--errors', help="Write rejected rows to this CSV file instead of stderr.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only; nothing is written.")
+        parser.add_argument(
+            '--skip-password-validation', action='store_true',
+            help="Do not run AUTH_PASSWORD_VALIDATORS on supplied passwords.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        kwargs = {
+            'chunk_size': options['chunk_size'],
+            'processes': options['processes'],
+            'dry_run': options['dry_run'],
+            'validate_passwords': not options['skip_password_validation'],
+        }
+        try:
+            if options['csv_file'] == '-':
+                report = import_students(sys.stdin, **kwargs)
+            else:
+                with open(options['csv_file'], newline='', encoding='utf-8-sig') as stream:
+                    report = import_students(stream, **kwargs)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if report.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='') as stream:
+                    report.write_errors(stream)
+            else:
+                report.write_errors(self.stderr)
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.created} student(s), rejected {len(report.errors)} row(s) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
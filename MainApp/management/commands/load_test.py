@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from MainApp.benchmarks.seed import PREFIX
+from MainApp.models import Course, User
+
+# The async enrollment-window views
+DEFAULT_VIEWS = ['course_list', 'course_detail', 'student_schedule']
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent GET requests at running servers and report throughput and latency, "
+        "e.g. to compare SERVER_MODE=wsgi and SERVER_MODE=asgi. Uses a seeded student; run "
+        "seed_benchmark_data against the same database first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+',
+            help="Servers to test as label=base_url, e.g. wsgi=http://127.0.0.1:8001 asgi=http://127.0.0.1:8002",
+        )
+        parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per target.")
+        parser.add_argument('--views', nargs='+', default=DEFAULT_VIEWS, help="URL names to cycle through.")
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        student = User.objects.filter(role='student', username__startswith=PREFIX).order_by('pk').first()
+        course = Course.objects.filter(code__startswith=PREFIX.upper()).order_by('pk').first()
+        if not (student and course):
+            raise CommandError("No seeded data found; run seed_benchmark_data first.")
+        paths = [
+            reverse(name, kwargs={'course_id': course.pk} if name == 'course_detail' else None)
+            for name in options['views']
+        ]
+        cookie = f'{settings.SESSION_COOKIE_NAME}={_login(student)}'
+
+        self.stdout.write(f"{'target':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for target in options['targets']:
+            label, _, base_url = target.rpartition('=')
+            result = run_load(
+                base_url.rstrip('/'), paths, cookie, options['requests'], options['concurrency'], options['timeout'],
+            )
+            self.stdout.write(
+                f"{label or base_url:<10}{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}"
+            )
+
+
+def _login(user):
+    # Same session Client.force_login() would create, so no password round trip is needed
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def run_load(base_url, paths, cookie, total, concurrency, timeout):
+    """Issue ``total`` GETs over ``paths`` from ``concurrency`` threads; returns summary metrics."""
+    timings, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            url = base_url + paths[i % len(paths)]
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers={'Cookie': cookie}), timeout=timeout) as response:
+                    response.read()
+                    # A redirect (e.g. to the login page) would otherwise count as a success
+                    ok = response.status == 200 and response.url == url
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                (timings if ok else errors).append(elapsed * 1000)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    timings.sort()
+
+    def percentile(p):
+        return timings[min(int(len(timings) * p), len(timings) - 1)] if timings else 0.0
+
+    return {
+        'throughput': len(timings) / wall,
+        'p50_ms': statistics.median(timings) if timings else 0.0,
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'errors': len(errors),
+    }
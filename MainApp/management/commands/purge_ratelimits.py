@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from MainApp.utils.ratelimit import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired rate-limit counters. Requests already purge a batch now and then; run "
+        "this from cron when the table grows faster than that, e.g. during an attack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.RATELIMIT_PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired rate-limit counter(s)."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from MainApp.sessions import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in batches so the session table does not grow without limit. "
+        "Run it periodically, e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SESSION_PURGE_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch_size'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired session(s)."))
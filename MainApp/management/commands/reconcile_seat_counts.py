@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from MainApp.models import Course
+from MainApp.utils.enrollment import approved_count_expression
+
+
+class Command(BaseCommand):
+    help = "Recompute Course.approved_count from approved enrollments and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        drifted = (
+            Course.objects.annotate(actual=approved_count_expression())
+            .exclude(approved_count=F('actual'))
+            .values_list('id', 'code', 'approved_count', 'actual')
+        )
+        count = 0
+        for course_id, code, stored, actual in drifted:
+            count += 1
+            self.stdout.write(f"{code}: stored {stored}, actual {actual}")
+            if options['dry_run']:
+                continue
+            with transaction.atomic():
+                # Recount under the row lock so concurrent approvals are not lost
+                list(Course.objects.select_for_update().filter(pk=course_id).values_list('pk', flat=True))
+                Course.objects.filter(pk=course_id).update(approved_count=approved_count_expression())
+        verb = "would repair" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Done: {verb} {count} course(s)."))
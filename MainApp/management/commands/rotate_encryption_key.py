@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from MainApp.models import StudentProfile
+from MainApp.utils.encryption import DecryptionError, current_header, decrypt_text, encrypt_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt student addresses that are not under the current ENCRYPTION_KEY: legacy "
+        "base64 rows and rows written with a key from ENCRYPTION_OLD_KEYS. Runs in short "
+        "transactions while the site stays up, and can be stopped and re-run at any time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per transaction.")
+        parser.add_argument('--start-after', type=int, default=0, help="Resume after this profile id.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that need re-encrypting.")
+
+    def handle(self, *args, **options):
+        stale = StudentProfile.objects.exclude(address_encrypted__startswith=current_header())
+        if options['dry_run']:
+            self.stdout.write(f"{stale.filter(pk__gt=options['start_after']).count()} row(s) need re-encrypting.")
+            return
+
+        started = time.perf_counter()
+        last_id, done, failed = options['start_after'], 0, []
+        while True:
+            with transaction.atomic():
+                # Locked so a concurrent profile edit is not overwritten with the old address
+                batch = list(
+                    stale.filter(pk__gt=last_id).order_by('pk')
+                    .select_for_update().only('pk', 'address_encrypted')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                changed = []
+                for profile in batch:
+                    try:
+                        profile.address_encrypted = encrypt_text(decrypt_text(profile.address_encrypted))
+                    except DecryptionError as exc:
+                        failed.append((profile.pk, str(exc)))
+                        continue
+                    changed.append(profile)
+                # bulk_update skips save(), so neither validation nor updated_at runs
+                StudentProfile.objects.bulk_update(changed, ['address_encrypted'])
+            last_id = batch[-1].pk
+            done += len(changed)
+            self.stdout.write(f"Re-encrypted {done} row(s); resume with --start-after {last_id}")
+
+        for pk, error in failed:
+            self.stderr.write(f"Profile {pk}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-encrypted {done} row(s), {len(failed)} unreadable, in {time.perf_counter() - started:.1f}s."
+        ))
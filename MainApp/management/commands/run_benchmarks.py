@@ -0,0 +1,67 @@
+import json
+import platform
+import sys
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from MainApp.benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = "Drive every project URL through the test client and report latency, query count and bytes per view."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--view', action='append', dest='views', help="Only run this URL name (repeatable).")
+        parser.add_argument('--output', help="Write results as JSON to this path.")
+        parser.add_argument('--baseline', help="Compare against a previous JSON result.")
+        parser.add_argument('--threshold', type=float, default=0.2, help="Relative change reported as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        missing = runner.unbenchmarked_urls()
+        if missing:
+            self.stderr.write(f"Not benchmarked (add them to runner.VIEWS or SKIPPED): {', '.join(missing)}")
+        try:
+            results = runner.run(options['iterations'], options['warmup'], options['views'])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'view':<30}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'bytes':>10}  status")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<30}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['queries']:>9}{row['bytes']:>10}  {row['status']}"
+            )
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'iterations': options['iterations'],
+                    'database': connection.vendor,
+                    'debug': settings.DEBUG,
+                    'python': sys.version.split()[0],
+                    'django': django.get_version(),
+                    'platform': platform.platform(),
+                },
+                'views': results,
+            }
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)['views']
+            regressions = runner.compare(results, baseline, options['threshold'])
+            for name, metric, before, after, change in regressions:
+                self.stdout.write(self.style.WARNING(f"{name}: {metric} {before} -> {after} ({change:+.0%})"))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+            elif options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against baseline.")
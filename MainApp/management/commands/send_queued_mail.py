@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from MainApp.utils.outbox import send_queued_batch
+
+
+class Command(BaseCommand):
+    help = "Drain the outbound email queue in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help="Seconds to sleep between polls when the queue is empty.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_queued_batch(batch_size=options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+                # A full batch usually means more rows are waiting
+                if sent + failed >= options['batch_size']:
+                    continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed."))
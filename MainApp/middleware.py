@@ -0,0 +1,236 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from MainApp.routers import request_routing
+
+logger = logging.getLogger('MainApp.metrics')
+
+# Metrics of the request being handled in this context, or None when it is not sampled
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth', 'statements')
+
+    def __init__(self, log_sql=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = [] if log_sql else None
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+        if metrics.statements is not None:
+            metrics.statements.append(sql)
+
+
+def _install_execute_wrapper(sender=None, connection=None, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _install_template_timer():
+    render = Template.render
+    if getattr(render, 'timed', False):
+        return
+
+    def timed_render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return render(self, context, request)
+        # Only the outermost render is timed so nested renders are not counted twice
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, query time, template render time and total time for a sample of
+    requests. Results go to a Server-Timing header and the 'MainApp.metrics' logger; views
+    issuing more than REQUEST_METRICS_QUERY_BUDGET queries log a warning.
+    Unsampled requests pay for one context variable lookup per query.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        self.query_budget = settings.REQUEST_METRICS_QUERY_BUDGET
+        self.log_sql = settings.REQUEST_METRICS_LOG_SQL
+        connection_created.connect(_install_execute_wrapper, dispatch_uid='request-metrics')
+        for connection in connections.all(initialized_only=True):
+            _install_execute_wrapper(connection=connection)
+        _install_template_timer()
+
+    def _sampled(self):
+        return self.sample_rate > 0 and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics(log_sql=self.log_sql)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._report(request, response, metrics, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        # sync_to_async copies the context, so queries run on the ORM thread still see these metrics
+        metrics = RequestMetrics(log_sql=self.log_sql)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._report(request, response, metrics, time.perf_counter() - started)
+        return response
+
+    def _report(self, request, response, metrics, total):
+        db_ms, template_ms, total_ms = metrics.db_time * 1000, metrics.template_time * 1000, total * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{metrics.queries} queries", '
+            f'tpl;dur={template_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else None
+        fields = {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(db_ms, 2),
+            'template_ms': round(template_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        logger.info(
+            "%s %s %s %.1fms queries=%d db=%.1fms tpl=%.1fms",
+            request.method, request.path, response.status_code, total_ms, metrics.queries, db_ms, template_ms,
+            extra={'metrics': fields},
+        )
+        if self.query_budget and metrics.queries > self.query_budget:
+            logger.warning(
+                "Query budget exceeded: %s issued %d queries (budget %d)",
+                view or request.path, metrics.queries, self.query_budget,
+                extra={'metrics': fields, 'statements': metrics.statements},
+            )
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Lets the request's reads go to a replica (MainApp.routers.ReplicaRouter), except
+    for unsafe methods and for clients that wrote within REPLICA_STICKY_SECONDS. A
+    cookie remembers the write, so users see their own changes despite replication lag.
+    Not loaded when no replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'primary_until'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _use_primary(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            return True
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _remember_write(self, response, state):
+        if state.wrote:
+            sticky = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                self.cookie_name, f'{time.time() + sticky:.0f}', max_age=sticky,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(self._use_primary(request)) as state:
+            response = self.get_response(request)
+        return self._remember_write(response, state)
+
+    async def __acall__(self, request):
+        with request_routing(self._use_primary(request)) as state:
+            response = await self.get_response(request)
+        return self._remember_write(response, state)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise's middleware is sync-only, which would make Django run the whole ASGI
+    request path behind a thread hop. Static file lookups are in-memory, so only the
+    actual file serving is handed to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
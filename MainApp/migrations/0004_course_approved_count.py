@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_approved_count(apps, schema_editor):
+    Course = apps.get_model('MainApp', 'Course')
+    Enrollment = apps.get_model('MainApp', 'Enrollment')
+    approved = (
+        Enrollment.objects.filter(course=OuterRef('pk'), status='approved')
+        .values('course').annotate(n=Count('id')).values('n')
+    )
+    Course.objects.update(approved_count=Coalesce(Subquery(approved), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0003_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_approved_count, migrations.RunPython.noop),
+    ]
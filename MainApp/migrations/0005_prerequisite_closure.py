@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    Course = apps.get_model('MainApp', 'Course')
+    PrerequisiteClosure = apps.get_model('MainApp', 'PrerequisiteClosure')
+    direct = {}
+    for course_id, prerequisite_id in Course.prerequisites.through.objects.values_list('from_course_id', 'to_course_id'):
+        direct.setdefault(course_id, set()).add(prerequisite_id)
+    rows = []
+    for course_id in direct:
+        seen = set()
+        stack = list(direct[course_id])
+        while stack:
+            prerequisite_id = stack.pop()
+            if prerequisite_id not in seen:
+                seen.add(prerequisite_id)
+                stack.extend(direct.get(prerequisite_id, ()))
+        rows.extend(PrerequisiteClosure(course_id=course_id, prerequisite_id=p) for p in seen)
+    PrerequisiteClosure.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0004_course_approved_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrerequisiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerequisite_closure', to='MainApp.course')),
+                ('prerequisite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependent_closure', to='MainApp.course')),
+            ],
+            options={
+                'unique_together': {('course', 'prerequisite')},
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+TABLE = '"MainApp_searchdocument"'
+FTS_TABLE = '"MainApp_searchdocument_fts"'
+
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        content, content={TABLE}, content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER "MainApp_searchdocument_ai" AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+    f"""CREATE TRIGGER "MainApp_searchdocument_ad" AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    f"""CREATE TRIGGER "MainApp_searchdocument_au" AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS "MainApp_searchdocument_ai"',
+    'DROP TRIGGER IF EXISTS "MainApp_searchdocument_ad"',
+    'DROP TRIGGER IF EXISTS "MainApp_searchdocument_au"',
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE INDEX "searchdocument_tsv_idx" ON {TABLE} USING GIN (to_tsvector('simple', content))""",
+    f"""CREATE INDEX "searchdocument_trgm_idx" ON {TABLE} USING GIN (content gin_trgm_ops)""",
+]
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS "searchdocument_tsv_idx"',
+    'DROP INDEX IF EXISTS "searchdocument_trgm_idx"',
+]
+
+
+def _sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite' and _sqlite_has_fts5(schema_editor):
+        statements = SQLITE_FORWARD
+    elif vendor == 'postgresql':
+        statements = POSTGRES_FORWARD
+    else:
+        # Other backends fall back to icontains scans in MainApp.utils.search
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def index_existing_rows(apps, schema_editor):
+    Course = apps.get_model('MainApp', 'Course')
+    StudentProfile = apps.get_model('MainApp', 'StudentProfile')
+    User = apps.get_model('MainApp', 'User')
+    SearchDocument = apps.get_model('MainApp', 'SearchDocument')
+    full_names = dict(StudentProfile.objects.values_list('user_id', 'full_name'))
+    documents = [
+        SearchDocument(kind='course', object_id=pk, content=' '.join(filter(None, (code, name, description))))
+        for pk, code, name, description in Course.objects.values_list('pk', 'code', 'name', 'description')
+    ]
+    documents += [
+        SearchDocument(kind='student', object_id=pk, content=' '.join(filter(None, (username, full_names.get(pk)))))
+        for pk, username in User.objects.filter(role='student').values_list('pk', 'username')
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0005_prerequisite_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('student', 'Student')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('content', models.TextField()),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
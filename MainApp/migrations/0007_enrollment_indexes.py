@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0006_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', 'status', 'course'], name='enroll_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', 'status', 'id'], name='enroll_course_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['requested_at', 'id'], name='enroll_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['course', 'requested_at', 'id'], name='enroll_course_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:29
+
+import re
+from datetime import time
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of MainApp.utils.schedule.parse_schedule; that module imports the live models,
+# and later changes to the parser must not change what this migration did
+
+_DAY_ALIASES = {
+    'mon': 0, 'monday': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1,
+    'wed': 2, 'weds': 2, 'wednesday': 2,
+    'thu': 3, 'thur': 3, 'thurs': 3, 'thursday': 3,
+    'fri': 4, 'friday': 4,
+    'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)?'
+_SEGMENT = re.compile(rf'^(?P<days>[a-z/&\s]+?)\s+{_TIME}\s*-\s*{_TIME}$')
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_schedule(text):
+    """
+    Parse free-text schedules such as 'Mon 10-12, Wed 10-12' or 'Tue/Thu 2:30pm-4pm'
+    into (weekday, start, end) tuples. Hours 1-6 without am/pm are read as afternoon.
+    Raises ValueError for anything it cannot read.
+    """
+    slots = []
+    for segment in filter(None, (part.strip() for part in re.split(r'[,;]', text.lower()))):
+        match = _SEGMENT.match(segment)
+        if not match:
+            raise ValueError(f"Cannot read schedule segment '{segment}'.")
+        days = [token for token in re.split(r'[/&\s]+|\band\b', match.group('days')) if token]
+        try:
+            weekdays = [_DAY_ALIASES[token] for token in days]
+        except KeyError as exc:
+            raise ValueError(f"Unknown day '{exc.args[0]}' in schedule.") from None
+        start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()[1:]
+        start = _to_minutes(start_hour, start_minute, start_meridiem or end_meridiem)
+        end = _to_minutes(end_hour, end_minute, end_meridiem)
+        if end <= start and not end_meridiem:
+            end += 12 * 60  # '11-1' means 11:00-13:00
+        if not 0 <= start < end <= MINUTES_PER_DAY:
+            raise ValueError(f"Invalid time range in schedule segment '{segment}'.")
+        slots.extend((weekday, _to_time(start), _to_time(end)) for weekday in weekdays)
+    return slots
+
+
+def _to_minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    elif meridiem is None and 1 <= hour <= 6:
+        hour += 12
+    if hour > 24 or minute > 59:
+        raise ValueError("Invalid time in schedule.")
+    return hour * 60 + minute
+
+
+def _to_time(minutes):
+    # TimeField cannot hold 24:00; treat a midnight end as the last minute of the day
+    minutes = min(minutes, MINUTES_PER_DAY - 1)
+    return time(minutes // 60, minutes % 60)
+
+
+def backfill_slots(apps, schema_editor):
+    Course = apps.get_model('MainApp', 'Course')
+    ScheduleSlot = apps.get_model('MainApp', 'ScheduleSlot')
+    rows = []
+    for course_id, schedule in Course.objects.exclude(schedule='').values_list('pk', 'schedule').iterator():
+        try:
+            parsed = parse_schedule(schedule)
+        except ValueError:
+            # Left without slots; the text is still shown and can be fixed in the admin
+            continue
+        rows.extend(
+            ScheduleSlot(course_id=course_id, weekday=weekday, start_time=start, end_time=end)
+            for weekday, start, end in parsed
+        )
+    ScheduleSlot.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0007_enrollment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='MainApp.course')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+                'indexes': [models.Index(fields=['course', 'weekday', 'start_time', 'end_time'], name='slot_course_day_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
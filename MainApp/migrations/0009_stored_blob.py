@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:55
+
+import MainApp.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MainApp', '0008_schedule_slot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='id_proof',
+            field=models.FileField(blank=True, null=True, storage=MainApp.storage.ContentAddressedStorage(), upload_to='documents/id_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='transcript',
+            field=models.FileField(blank=True, null=True, storage=MainApp.storage.ContentAddressedStorage(), upload_to='documents/transcripts/'),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'last_used_at'], name='blob_gc_idx')],
+            },
+        ),
+    ]
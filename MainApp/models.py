@@ -1,9 +1,13 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from MainApp.utils.encryption import encrypt_text, decrypt_text
-import bleach
+from MainApp.utils.encryption import DecryptionError, encrypt_text, decrypt_text
+from MainApp.storage import document_storage, sniff_file
+from MainApp.utils.sanitize import sanitize
+from MainApp.utils.tracking import TrackedFieldsMixin
 from django.core.files.uploadedfile import UploadedFile
 
 ALLOWED_FILE_TYPES = ['application/pdf', 'image/jpeg', 'image/png']
@@ -34,15 +38,16 @@ class User(AbstractUser):
         ]
 
 
-class StudentProfile(models.Model):
+class StudentProfile(TrackedFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, unique=True, related_name='student_profile')
     full_name = models.CharField(max_length=100)
     age = models.PositiveIntegerField()
     contact_number = models.CharField(max_length=20)
     address_encrypted = models.TextField()
     guardian_email = models.EmailField(db_index=True)
-    transcript = models.FileField(upload_to='documents/transcripts/', null=True, blank=True)
-    id_proof = models.FileField(upload_to='documents/id_proofs/', null=True, blank=True)
+    # Deduplicated by content; see MainApp.storage
+    transcript = models.FileField(upload_to='documents/transcripts/', storage=document_storage, null=True, blank=True)
+    id_proof = models.FileField(upload_to='documents/id_proofs/', storage=document_storage, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
@@ -60,32 +65,76 @@ class StudentProfile(models.Model):
     def get_decrypted_address(self):
         try:
             return decrypt_text(self.address_encrypted)
-        except Exception:
+        except DecryptionError:
             return "[Decryption Error]"
 
     def clean(self):
-        # Sanitize and encrypt address
-        clean_address = bleach.clean(self.get_decrypted_address())
-        self.address_encrypted = encrypt_text(clean_address)
+        # None for a new profile, where everything is checked
+        changed = self.changed_fields()
+
+        # Sanitize and re-encrypt address; an unreadable value must not be overwritten with the placeholder
+        if changed is None or 'address_encrypted' in changed:
+            try:
+                clean_address = sanitize(decrypt_text(self.address_encrypted))
+            except DecryptionError as exc:
+                raise ValidationError({'address_encrypted': str(exc)})
+            self.address_encrypted = encrypt_text(clean_address)
 
         # Validate file types and sizes
-        for file_field in [self.transcript, self.id_proof]:
+        for name in ('transcript', 'id_proof'):
+            if changed is not None and name not in changed:
+                continue
+            file_field = getattr(self, name)
             # Skip validation if the file is cleared (None or False)
             if not file_field:
                 continue
             # Only check content_type if it's an uploaded file
             if hasattr(file_field, 'file') and isinstance(file_field.file, UploadedFile):
-                if file_field.file.content_type not in ALLOWED_FILE_TYPES:
+                # The browser-sent content_type is not trusted; the file's own bytes decide
+                if sniff_file(file_field.file) not in ALLOWED_FILE_TYPES:
                     raise ValidationError("Invalid file type.")
                 if file_field.size > MAX_FILE_SIZE_MB * 1024 * 1024:
                     raise ValidationError("File size exceeds limit.")
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        changed = self.changed_fields()
+        # Unchanged fields were validated when they were written
+        self.full_clean(exclude=None if changed is None else [f.name for f in self._meta.fields if f.name not in changed])
         super().save(*args, **kwargs)
 
 
-class TeacherProfile(models.Model):
+class StoredBlob(models.Model):
+    # One row per file in ContentAddressedStorage. ref_count is the number of profile
+    # file fields pointing at it, kept by signals; gc_blobs deletes unreferenced blobs
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['ref_count', 'last_used_at'], name='blob_gc_idx')]
+
+    def __str__(self):
+        return self.name
+
+
+class RateLimitCounter(models.Model):
+    # Request counts of one rate-limit key in its current and previous fixed window,
+    # shared by all workers; see MainApp.utils.ratelimit
+    key = models.CharField(max_length=255, unique=True)
+    window = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    previous_count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class TeacherProfile(TrackedFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, unique=True, related_name='teacher_profile')
     full_name = models.CharField(max_length=100)
     department = models.CharField(max_length=100)
@@ -103,6 +152,21 @@ class TeacherProfile(models.Model):
         return self.full_name
 
 
+class CourseFull(ValidationError):
+    pass
+
+
+class CourseQuerySet(models.QuerySet):
+    def reserve_seats(self, course_id, count=1):
+        # Single conditional UPDATE: concurrent callers can never push approved_count past capacity
+        return self.filter(pk=course_id, approved_count__lte=F('capacity') - count).update(
+            approved_count=F('approved_count') + count
+        ) == 1
+
+    def release_seats(self, course_id, count=1):
+        self.filter(pk=course_id).update(approved_count=Greatest(F('approved_count') - count, 0))
+
+
 class Course(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
@@ -111,12 +175,59 @@ class Course(models.Model):
     teacher = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, limit_choices_to={'role': 'teacher'}, related_name='courses')
     schedule = models.CharField(max_length=100, blank=True)  # e.g., 'Mon 10-12, Wed 10-12'
     capacity = models.PositiveIntegerField(default=30)
+    # Denormalized count of approved enrollments, maintained by Enrollment.save and the review paths
+    approved_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    @property
+    def seats_available(self):
+        return max(self.capacity - self.approved_count, 0)
+
+
+class PrerequisiteClosure(models.Model):
+    # One row per (course, prerequisite) pair reachable through Course.prerequisites, direct or transitive
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisite_closure')
+    prerequisite = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='dependent_closure')
+
+    class Meta:
+        unique_together = ('course', 'prerequisite')
+
+    def __str__(self):
+        return f"{self.course.code} requires {self.prerequisite.code}"
+
+
+class ScheduleSlot(models.Model):
+    # Structured form of Course.schedule, rebuilt whenever the course is saved
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='slots')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        indexes = [
+            # conflict checks: overlapping slots among a set of courses on the same weekday
+            models.Index(fields=['course', 'weekday', 'start_time', 'end_time'], name='slot_course_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.code} {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
 
 class Enrollment(models.Model):
     STATUS_CHOICES = [
@@ -132,8 +243,97 @@ class Enrollment(models.Model):
     reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, limit_choices_to={'role': 'admin'}, related_name='reviewed_enrollments')
     note = models.TextField(blank=True)
 
+    # (status, course_id) as last read from or written to the database
+    _saved_state = (None, None)
+
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # student_schedule, prerequisite checks: (student, status) lookups
+            models.Index(fields=['student', 'status', 'course'], name='enroll_student_status_idx'),
+            # rosters: (course, status) in keyset order
+            models.Index(fields=['course', 'status', 'id'], name='enroll_course_status_idx'),
+            # review queues only ever read pending rows; partial indexes stay small as history grows
+            models.Index(fields=['requested_at', 'id'], name='enroll_pending_idx', condition=Q(status='pending')),
+            models.Index(fields=['course', 'requested_at', 'id'], name='enroll_course_pending_idx', condition=Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.code} ({self.status})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_state = (instance.__dict__.get('status'), instance.__dict__.get('course_id'))
+        return instance
+
+    def clean(self):
+        if self._takes_seat() and self.course_id and not Course.objects.get(pk=self.course_id).seats_available:
+            raise CourseFull("No seats available in this course.")
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.pk is not None:
+                # The locked row, not this instance's possibly stale copy, says whether a
+                # seat is already held; a concurrent save of the same row waits here
+                self._saved_state = Enrollment.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'status', 'course_id',
+                ).first() or (None, None)
+            self._sync_seat_count()
+            super().save(*args, **kwargs)
+        self._saved_state = (self.status, self.course_id)
+
+    def _takes_seat(self):
+        was_status, was_course = self._saved_state
+        return self.status == 'approved' and (was_status != 'approved' or was_course != self.course_id)
+
+    def _sync_seat_count(self):
+        was_status, was_course = self._saved_state
+        if was_status == 'approved' and (self.status != 'approved' or was_course != self.course_id):
+            Course.objects.release_seats(was_course)
+        if self._takes_seat() and not Course.objects.reserve_seats(self.course_id):
+            raise CourseFull("No seats available in this course.")
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject} ({self.status})"
+
+
+class SearchDocument(models.Model):
+    # Denormalized text of searchable objects; indexed by FTS5 on SQLite and GIN on PostgreSQL
+    KIND_CHOICES = [
+        ('course', 'Course'),
+        ('student', 'Student'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    content = models.TextField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
 
     def __str__(self):
-        return f"{self.student.username} - {self.course.code} ({self.status})"
\ No newline at end of file
+        return f"{self.kind} #{self.object_id}"
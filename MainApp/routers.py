@@ -0,0 +1,100 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Apps whose rows must never be read stale: a logged-out session or an invalidated cache
+# entry read back from a lagging replica would be wrong, not merely old
+PRIMARY_APPS = {'sessions', 'django_cache'}
+
+# Routing of the request being handled; None outside requests (management commands,
+# the shell, background threads), which always use the primary
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    __slots__ = ('replica', 'use_primary', 'wrote')
+
+    def __init__(self, replica, use_primary):
+        # One replica per request, so its queries all see the same point in time
+        self.replica = replica
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+@contextmanager
+def request_routing(use_primary=False):
+    """Lets reads in the block go to a replica (unless ``use_primary``); yields the RoutingState."""
+    replicas = settings.DATABASE_REPLICAS
+    state = RoutingState(random.choice(replicas) if replicas else None, use_primary or not replicas)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def primary():
+    """Send every read in the block to the primary."""
+    state = _state.get()
+    if state is None or state.use_primary:
+        yield
+        return
+    state.use_primary = True
+    try:
+        yield
+    finally:
+        state.use_primary = False
+
+
+def primary_only(view):
+    """View decorator: the whole view reads from the primary, e.g. pages whose data is acted on at once."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            with primary():
+                return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            with primary():
+                return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReplicaRouter:
+    """
+    Sends reads made while handling a request to one of DATABASE_REPLICAS, and everything
+    else to the primary: writes, reads inside transaction.atomic() (select_for_update,
+    read-modify-write), requests ReplicaStickinessMiddleware pinned to the primary, and
+    views wrapped in primary_only().
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or state.use_primary
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label != 'django_cache':
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+logger = logging.getLogger('django.contrib.sessions')
+
+
+def purge_expired(batch_size=1000, max_batches=None):
+    """Delete expired sessions ``batch_size`` rows at a time; returns the number deleted."""
+    Session = DBStore.get_model_class()
+    now = timezone.now()
+    deleted, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:batch_size])
+        if not keys:
+            break
+        deleted += Session.objects.filter(pk__in=keys, expire_date__lt=now).delete()[0]
+        batches += 1
+        if len(keys) < batch_size:
+            break
+    return deleted
+
+
+class SessionStore(CachedDBStore):
+    """
+    Django's cached_db sessions (cache first, database on a miss) minus the database
+    writes that change nothing durable. A save with unchanged data only moves the expiry,
+    so the row is rewritten once it has moved more than SESSION_DB_WRITE_INTERVAL
+    seconds; the cached copy always has the current expiry.
+    """
+    # Cached values are (serialized data, expiry of the database row), not cached_db's dict
+    cache_key_prefix = 'MainApp.sessions'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # What the database row holds, as far as this store knows
+        self._stored = None
+
+    def _from_cache(self, cached):
+        blob, expire_date = cached
+        self._stored = (blob, expire_date)
+        return self.serializer().loads(blob)
+
+    def _from_db(self, session):
+        data = self.decode(session.session_data)
+        self._stored = (self.serializer().dumps(data), session.expire_date)
+        return data
+
+    def _db_is_current(self, data, expire_date):
+        if self._stored is None:
+            return False
+        blob, stored_expiry = self._stored
+        # A shortened expiry is always written
+        return (
+            timedelta(0) <= expire_date - stored_expiry < timedelta(seconds=settings.SESSION_DB_WRITE_INTERVAL)
+            and self.serializer().dumps(data) == blob
+        )
+
+    def load(self):
+        try:
+            cached = self._cache.get(self.cache_key)
+        except Exception:
+            cached = None
+        if cached is not None:
+            return self._from_cache(cached)
+        session = self._get_session_from_db()
+        if session is None:
+            return {}
+        data = self._from_db(session)
+        self._cache.set(self.cache_key, self._stored, self.get_expiry_age(expiry=session.expire_date))
+        return data
+
+    async def aload(self):
+        try:
+            cached = await self._cache.aget(await self.acache_key())
+        except Exception:
+            cached = None
+        if cached is not None:
+            return self._from_cache(cached)
+        session = await self._aget_session_from_db()
+        if session is None:
+            return {}
+        data = self._from_db(session)
+        await self._cache.aset(
+            await self.acache_key(), self._stored, await self.aget_expiry_age(expiry=session.expire_date),
+        )
+        return data
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if must_create or not self._db_is_current(data, self.get_expiry_date()):
+            DBStore.save(self, must_create)
+            self._stored = (self.serializer().dumps(data), self.get_expiry_date())
+        try:
+            self._cache.set(self.cache_key, self._stored, self.get_expiry_age())
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+
+    async def asave(self, must_create=False):
+        if self.session_key is None:
+            return await self.acreate()
+        data = await self._aget_session(no_load=must_create)
+        if must_create or not self._db_is_current(data, await self.aget_expiry_date()):
+            await DBStore.asave(self, must_create)
+            self._stored = (self.serializer().dumps(data), await self.aget_expiry_date())
+        try:
+            await self._cache.aset(await self.acache_key(), self._stored, await self.aget_expiry_age())
+        except Exception:
+            logger.exception("Error saving to cache (%s)", self._cache)
+
+    @classmethod
+    def clear_expired(cls):
+        # Used by `manage.py clearsessions`; batched so the table is not locked for long
+        purge_expired(settings.SESSION_PURGE_BATCH_SIZE)
@@ -0,0 +1,144 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Course, Enrollment, StudentProfile, TeacherProfile, User
+from .utils.blobs import DOCUMENT_FIELDS, adjust_references
+from .utils.dashboard import invalidate_dashboards
+from .utils.prerequisites import dependents_of, rebuild_closure, validate_prerequisites
+from .utils.schedule import sync_slots
+from .utils.search import course_content, index_object, student_content, unindex_object
+from .utils.thumbnails import THUMBNAIL_FIELDS, schedule_thumbnails
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_seat_on_delete(sender, instance, **kwargs):
+    # Fires for queryset and cascade deletes too, which bypass Model.delete()
+    if instance.status == 'approved':
+        Course.objects.release_seats(instance.course_id)
+
+
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def sync_prerequisite_closure(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add':
+        # reverse: ``instance`` becomes a prerequisite of every course in pk_set
+        edges = [(pk, [instance.pk]) for pk in pk_set] if reverse else [(instance.pk, pk_set)]
+        for course_id, prerequisite_ids in edges:
+            validate_prerequisites(course_id, prerequisite_ids)
+    elif action == 'pre_clear' and reverse:
+        instance._cleared_dependents = set(instance.course_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        rebuild_closure(pk_set if reverse else {instance.pk})
+    elif action == 'post_clear':
+        rebuild_closure(getattr(instance, '_cleared_dependents', set()) if reverse else {instance.pk})
+
+
+@receiver(pre_delete, sender=Course)
+def remember_dependents(sender, instance, **kwargs):
+    instance._dependents = dependents_of({instance.pk})
+
+
+@receiver(post_delete, sender=Course)
+def rebuild_dependents_closure(sender, instance, **kwargs):
+    rebuild_closure(getattr(instance, '_dependents', set()))
+
+
+@receiver(post_save, sender=Course)
+def sync_schedule_slots(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'schedule' not in update_fields:
+        return
+    sync_slots(instance)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, **kwargs):
+    index_object('course', instance.pk, course_content(instance))
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    unindex_object('course', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_student(sender, instance, update_fields=None, **kwargs):
+    # login() saves last_login on every sign-in; only a username change affects the index
+    if instance.role != 'student' or (update_fields and 'username' not in update_fields):
+        return
+    full_name = StudentProfile.objects.filter(user=instance).values_list('full_name', flat=True).first()
+    index_object('student', instance.pk, student_content(instance, full_name))
+
+
+@receiver(post_save, sender=StudentProfile)
+def index_student_profile(sender, instance, update_fields=None, **kwargs):
+    # Profile saves only write changed columns; the index holds nothing but the name
+    if update_fields and 'full_name' not in update_fields:
+        return
+    index_object('student', instance.user_id, student_content(instance.user, instance.full_name))
+
+
+@receiver(post_delete, sender=User)
+def unindex_student(sender, instance, **kwargs):
+    unindex_object('student', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=TeacherProfile)
+def invalidate_profile_dashboard(sender, instance, **kwargs):
+    invalidate_dashboards([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_student_dashboard(sender, instance, **kwargs):
+    invalidate_dashboards([instance.student_id])
+
+
+@receiver(pre_save, sender=Course)
+def remember_teacher(sender, instance, **kwargs):
+    # A reassigned course leaves the previous teacher's dashboard too
+    instance._previous_teacher_id = (
+        Course.objects.filter(pk=instance.pk).values_list('teacher_id', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_teacher_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards([instance.teacher_id, getattr(instance, '_previous_teacher_id', None)])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_dashboard(sender, instance, update_fields=None, **kwargs):
+    # The cached fragment shows the username; last_login updates on sign-in do not matter
+    if not update_fields or 'username' in update_fields:
+        invalidate_dashboards([instance.pk])
+
+
+@receiver(post_save, sender=StudentProfile)
+def count_document_references(sender, instance, created, update_fields=None, **kwargs):
+    # saved_value() still holds the names from before this save
+    added, removed = [], []
+    for field in DOCUMENT_FIELDS:
+        if update_fields is not None and field not in update_fields:
+            continue
+        before = None if created else instance.saved_value(field)
+        after = getattr(instance, field).name or None
+        if before != after:
+            added.append(after)
+            removed.append(before)
+    adjust_references(added, 1)
+    adjust_references(removed, -1)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def release_document_references(sender, instance, **kwargs):
+    adjust_references([getattr(instance, field).name for field in DOCUMENT_FIELDS], -1)
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=TeacherProfile)
+def create_thumbnails(sender, instance, created, update_fields=None, **kwargs):
+    changed = [
+        field for field in THUMBNAIL_FIELDS[sender._meta.model_name]
+        if (update_fields is None or field in update_fields)
+        and (created or instance.saved_value(field) != (getattr(instance, field).name or None))
+    ]
+    schedule_thumbnails(instance, changed)
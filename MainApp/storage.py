@@ -0,0 +1,76 @@
+import hashlib
+import os
+import uuid
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+# Leading bytes of the document types students may upload
+MAGIC_NUMBERS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+)
+EXTENSIONS = {'application/pdf': '.pdf', 'image/jpeg': '.jpg', 'image/png': '.png'}
+
+
+def sniff_content_type(head):
+    """Content type from the first bytes of a file, or '' when it is not a known type."""
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    return ''
+
+
+def sniff_file(file):
+    """sniff_content_type() for a file object; its position is restored."""
+    position = file.tell()
+    file.seek(0)
+    try:
+        return sniff_content_type(file.read(16))
+    finally:
+        file.seek(position)
+
+
+@deconstructible(path='MainApp.storage.ContentAddressedStorage')
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct upload once, as blobs/<xx>/<sha256><ext>, and records it in
+    StoredBlob. An upload whose content is already stored only costs the hash. Reference
+    counts are kept by signals, and `manage.py gc_blobs` deletes unreferenced blobs.
+    """
+    prefix = 'documents/blobs'
+
+    def get_available_name(self, name, max_length=None):
+        # _save() picks the final name from the content, so any name will do here
+        return name
+
+    def _save(self, name, content):
+        sha, size, head = hashlib.sha256(), 0, b''
+        for chunk in content.chunks():
+            if len(head) < 16:
+                head += chunk[:16 - len(head)]
+            sha.update(chunk)
+            size += len(chunk)
+        digest = sha.hexdigest()
+        content_type = sniff_content_type(head)
+        extension = EXTENSIONS.get(content_type) or os.path.splitext(name)[1].lower()
+        name = f'{self.prefix}/{digest[:2]}/{digest}{extension}'
+
+        StoredBlob = apps.get_model('MainApp', 'StoredBlob')
+        blob, created = StoredBlob.objects.get_or_create(
+            digest=digest, defaults={'name': name, 'size': size, 'content_type': content_type},
+        )
+        if not created:
+            # Marks the blob as in use so gc_blobs leaves it alone until the profile is saved
+            StoredBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now())
+        if not self.exists(blob.name):
+            # Written under a temporary name and renamed, so readers never see a partial file
+            partial = super()._save(f'{blob.name}.{uuid.uuid4().hex}.part', content)
+            os.replace(self.path(partial), self.path(blob.name))
+        return blob.name
+
+
+document_storage = ContentAddressedStorage()
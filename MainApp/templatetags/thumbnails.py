@@ -0,0 +1,13 @@
+from django import template
+
+from MainApp.utils.thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(file, size='small'):
+    """URL of a file's ``size`` thumbnail; the original until the thumbnail is generated."""
+    if not file:
+        return ''
+    return thumbnail_url(file, size) or file.url
@@ -1,3 +1,804 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import time, timedelta
+from time import monotonic, sleep
 
-# Create your tests here.
+import bleach
+from django.conf import settings
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, connections, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .admin import MAX_IMPORT_PASSWORD_ROWS
+from .middleware import ReplicaStickinessMiddleware
+from .models import (
+    User, Course, CourseFull, Enrollment, OutboundEmail, RateLimitCounter, ScheduleSlot, SearchDocument, StoredBlob,
+    StudentProfile,
+)
+from .routers import ReplicaRouter, primary, request_routing
+from .sessions import SessionStore, purge_expired as purge_expired_sessions
+from .storage import document_storage
+from .templatetags.thumbnails import thumbnail
+from .utils.encryption import DecryptionError, decrypt_many, decrypt_text, encrypt_text
+from .utils.enrollment import review_enrollments
+from .utils.outbox import queue_email, send_queued_batch
+from .utils.logs import BackgroundHandler, JsonFormatter
+from .utils.pagination import paginate_keyset
+from .utils.prerequisites import missing_prerequisites
+from .utils.ratelimit import hit, purge_expired
+from .utils.schedule import IntervalTree, conflicting_slots, find_conflicts, parse_schedule
+from .utils.sanitize import RICH, sanitize, sanitize_many, sanitize_rows
+from .utils.search import SEARCH_LIMIT, matching, search_ids
+from .utils.student_import import import_students
+from .utils.thumbnails import thumbnail_name
+
+
+def make_user(username, role):
+    # Skips password hashing, which dominates test run time
+    return User.objects.create(username=username, email=f'{username}@example.com', role=role)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin1', 'admin')
+        self.student = make_user('stud1', 'student')
+        self.course = Course.objects.create(name='Algebra', code='MATH101')
+
+    def test_review_queues_email_instead_of_sending(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.client.force_login(self.admin)
+        self.client.post(reverse('admin_enrollment_requests'), {'enrollment_id': enrollment.id, 'action': 'approve'})
+
+        self.assertEqual(mail.outbox, [])
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.recipient, 'stud1@example.com')
+        self.assertIn('Approved', queued.subject)
+
+        self.assertEqual(send_queued_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboundEmail.objects.get().status, 'sent')
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_BASE_SECONDS=0)
+    def test_failures_back_off_then_dead_letter(self):
+        queue_email('Subject', 'Body', 'stud1@example.com')
+
+        class BrokenConnection:
+            def open(self):
+                raise OSError("connection refused")
+
+        self.assertEqual(send_queued_batch(connection=BrokenConnection()), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+
+        send_queued_batch(connection=BrokenConnection())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', 2))
+        self.assertIn('connection refused', email.last_error)
+
+
+class BulkDecisionTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('teach1', 'teacher')
+        self.course = Course.objects.create(name='Physics', code='PHY101', capacity=2, teacher=self.teacher)
+        self.other = Course.objects.create(name='Chemistry', code='CHE101')
+        self.enrollments = [
+            Enrollment.objects.create(
+                student=make_user(f's{i}', 'student'),
+                course=self.course,
+            )
+            for i in range(3)
+        ]
+
+    def test_bulk_approve_respects_capacity_and_queues_notifications(self):
+        outsider = Enrollment.objects.create(student=self.enrollments[0].student, course=self.other)
+        self.client.force_login(self.teacher)
+        self.client.post(reverse('bulk_enrollment_decision'), {
+            'action': 'approve',
+            'enrollment_ids': [e.id for e in self.enrollments] + [outsider.id],
+        })
+
+        statuses = [Enrollment.objects.get(id=e.id).status for e in self.enrollments]
+        self.assertEqual(statuses, ['approved', 'approved', 'pending'])
+        # Teachers cannot decide on other teachers' courses
+        self.assertEqual(Enrollment.objects.get(id=outsider.id).status, 'pending')
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name='Biology', code='BIO101', capacity=1)
+        self.students = [make_user(f'b{i}', 'student') for i in range(2)]
+
+    def test_counter_follows_status_transitions_and_deletes(self):
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course, status='approved')
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.approved_count, 1)
+
+        with self.assertRaises(CourseFull):
+            Enrollment.objects.create(student=self.students[1], course=self.course, status='approved')
+
+        enrollment.status = 'denied'
+        enrollment.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.approved_count, 0)
+
+        enrollment.status = 'approved'
+        enrollment.save()
+        Enrollment.objects.filter(pk=enrollment.pk).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.approved_count, 0)
+
+    def test_stale_copies_reserve_one_seat(self):
+        self.course.capacity = 2
+        self.course.save()
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course)
+        first, second = Enrollment.objects.get(pk=enrollment.pk), Enrollment.objects.get(pk=enrollment.pk)
+        for copy in (first, second):
+            copy.status = 'approved'
+            copy.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.approved_count, 1)
+
+
+class PrerequisiteClosureTests(TestCase):
+    def setUp(self):
+        self.intro, self.mid, self.advanced = (
+            Course.objects.create(name=name, code=code, capacity=5)
+            for name, code in (('Intro', 'CS101'), ('Mid', 'CS201'), ('Advanced', 'CS301'))
+        )
+        self.mid.prerequisites.add(self.intro)
+        self.advanced.prerequisites.add(self.mid)
+        self.student = make_user('p1', 'student')
+
+    def test_missing_prerequisites_are_transitive(self):
+        self.assertEqual(list(missing_prerequisites(self.student, self.advanced)), [self.intro, self.mid])
+        Enrollment.objects.create(student=self.student, course=self.intro, status='approved')
+        with self.assertNumQueries(1):
+            self.assertEqual(list(missing_prerequisites(self.student, self.advanced)), [self.mid])
+
+    def test_only_own_approval_counts(self):
+        Enrollment.objects.create(student=self.student, course=self.intro, status='denied')
+        Enrollment.objects.create(student=make_user('p2', 'student'), course=self.intro, status='approved')
+        self.assertEqual(list(missing_prerequisites(self.student, self.mid)), [self.intro])
+
+    def test_explain_queries_analyze_needs_postgres(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest("EXPLAIN ANALYZE is supported here")
+        with self.assertRaisesMessage(CommandError, '--analyze needs PostgreSQL'):
+            call_command('explain_queries', analyze=True, stdout=io.StringIO())
+        Course.objects.filter(pk=self.intro.pk).update(teacher=make_user('pt', 'teacher'))
+        call_command('explain_queries', stdout=io.StringIO())
+
+    def test_closure_follows_removals(self):
+        self.mid.prerequisites.remove(self.intro)
+        self.assertEqual(list(missing_prerequisites(self.student, self.advanced)), [self.mid])
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.intro.prerequisites.add(self.advanced)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.advanced.course_set.add(self.intro)
+        self.assertFalse(self.intro.prerequisites.exists())
+
+
+class ScheduleTests(TestCase):
+    def test_parses_common_formats(self):
+        self.assertEqual(parse_schedule('Mon 10-12, Wed 10-12'), [(0, time(10), time(12)), (2, time(10), time(12))])
+        self.assertEqual(parse_schedule('Tue/Thu 2:30pm-4pm'), [(1, time(14, 30), time(16)), (3, time(14, 30), time(16))])
+        self.assertEqual(parse_schedule('Fri 11-1'), [(4, time(11), time(13))])
+        with self.assertRaises(ValueError):
+            parse_schedule('Someday 10-12')
+
+    def test_interval_tree_matches_brute_force(self):
+        intervals = [(start, start + length, i) for i, (start, length) in enumerate(
+            (s, l) for s in range(0, 300, 7) for l in (5, 30, 90))]
+        tree = IntervalTree(intervals)
+        for start, end in ((0, 1), (50, 60), (120, 121), (299, 400), (400, 500)):
+            expected = sorted(p for s, e, p in intervals if s < end and e > start)
+            self.assertEqual(sorted(tree.overlapping(start, end)), expected)
+
+    def test_conflicts_use_structured_slots(self):
+        teacher, student = make_user('st1', 'teacher'), make_user('ss1', 'student')
+        morning = Course.objects.create(name='Morning', code='M1', teacher=teacher, schedule='Mon 10-12, Wed 10-12')
+        overlap = Course.objects.create(name='Overlap', code='M2', teacher=teacher, schedule='Wed 11-1')
+        Course.objects.create(name='Later', code='M3', teacher=teacher, schedule='Wed 12-2')
+        Enrollment.objects.create(student=student, course=morning, status='approved')
+        taken = Course.objects.filter(enrollments__student=student)
+        with self.assertNumQueries(1):
+            self.assertEqual([slot.course for slot in conflicting_slots(overlap, taken)], [morning])
+        self.assertEqual(
+            [(a.course.code, b.course.code) for a, b in find_conflicts(ScheduleSlot.objects.select_related('course'))],
+            [('M1', 'M2'), ('M2', 'M3')],
+        )
+        morning.schedule = 'Tue 10-12'
+        morning.save()
+        self.assertFalse(conflicting_slots(overlap, taken).exists())
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        self.student = make_user('dash1', 'student')
+        StudentProfile.objects.create(
+            user=self.student, full_name='Dash One', age=20, contact_number='555', address_encrypted=encrypt_text('1 Road'),
+            guardian_email='guardian@example.com',
+        )
+        self.course = Course.objects.create(name='Biology', code='BIO101')
+        self.client.force_login(self.student)
+
+    def test_cached_until_enrollment_changes(self):
+        self.assertContains(self.client.get(reverse('dashboard')), '0 approved, 0 pending')
+        with self.assertNumQueries(5):
+            # session, user, dashboard version, context, fragment
+            self.assertContains(self.client.get(reverse('dashboard')), '0 approved, 0 pending')
+
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.assertContains(self.client.get(reverse('dashboard')), '0 approved, 1 pending')
+        # Bulk review updates rows without signals and must invalidate on its own
+        review_enrollments(Enrollment.objects.all(), [enrollment.id], 'approve', make_user('dashadmin', 'admin'))
+        self.assertContains(self.client.get(reverse('dashboard')), '1 approved, 0 pending')
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('async1', 'student')
+        cls.course = Course.objects.create(name='Async', code='ASY101', schedule='Mon 9-10')
+
+    async def test_enroll_and_browse_on_the_async_path(self):
+        await self.async_client.aforce_login(self.student)
+        response = await self.async_client.post(reverse('course_detail', args=[self.course.id]))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Enrollment.objects.filter(student=self.student, status='pending').aexists())
+        for url in (reverse('course_list'), reverse('course_detail', args=[self.course.id]), reverse('student_schedule')):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Server-Timing', response.headers)
+
+
+class StudentImportTests(TestCase):
+    CSV = (
+        'username,email,password,full_name,age,contact_number,address,guardian_email\n'
+        'imp1,imp1@example.com,Correct-Horse-42,Ann <script>Lee</script>,19,555-0100,1 Main St,g1@example.com\n'
+        'imp2,,,Bo Chen,20,555-0101,2 Main St,g2@example.com\n'
+        'imp1,,,Dup Row,21,555-0102,3 Main St,g3@example.com\n'
+        'imp4,,,Bad Age,old,555-0103,4 Main St,g4@example.com\n'
+        'taken,,,Existing User,22,555-0104,5 Main St,g5@example.com\n'
+    )
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        make_user('taken', 'student')
+        report = import_students(io.StringIO(self.CSV), chunk_size=2, processes=1)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([(line, username) for line, username, _ in report.errors], [(4, 'imp1'), (5, 'imp4'), (6, 'taken')])
+        first = User.objects.get(username='imp1')
+        self.assertTrue(first.check_password('Correct-Horse-42'))
+        self.assertEqual(first.student_profile.full_name, 'Ann &lt;script&gt;Lee&lt;/script&gt;')
+        self.assertEqual(first.student_profile.get_decrypted_address(), '1 Main St')
+        self.assertFalse(User.objects.get(username='imp2').has_usable_password())
+        self.assertEqual(search_ids('student', 'chen'), [User.objects.get(username='imp2').pk])
+
+    def test_admin_upload(self):
+        admin_user = User.objects.create(username='staff', role='admin', is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        upload = SimpleUploadedFile('students.csv', self.CSV.encode(), content_type='text/csv')
+        response = self.client.post(reverse('admin:MainApp_studentprofile_import'), {'csv_file': upload, 'dry_run': 'on'})
+        self.assertContains(response, 'age must be a positive whole number.')
+        self.assertFalse(User.objects.filter(username='imp2').exists())
+
+    def test_admin_upload_rejects_bad_files_before_importing(self):
+        self.client.force_login(User.objects.create(username='staff', role='admin', is_staff=True, is_superuser=True))
+        oversized_field = 'x' * (csv.field_size_limit() + 1)
+        for content in (self.CSV.encode() + b'\xff', (self.CSV + oversized_field).encode()):
+            upload = SimpleUploadedFile('students.csv', content, content_type='text/csv')
+            response = self.client.post(reverse('admin:MainApp_studentprofile_import'), {'csv_file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].errors['csv_file'])
+        self.assertFalse(User.objects.filter(username__startswith='imp').exists())
+
+    def test_admin_upload_caps_rows_with_passwords(self):
+        self.client.force_login(User.objects.create(username='staff', role='admin', is_staff=True, is_superuser=True))
+        header, row = self.CSV.splitlines()[:2]
+        rows = [row.replace('imp1', f'pw{i}') for i in range(MAX_IMPORT_PASSWORD_ROWS + 1)]
+        upload = SimpleUploadedFile('students.csv', '\n'.join([header, *rows]).encode(), content_type='text/csv')
+        response = self.client.post(reverse('admin:MainApp_studentprofile_import'), {'csv_file': upload})
+        self.assertIn('manage.py import_students', response.context['form'].errors['csv_file'][0])
+        self.assertFalse(User.objects.filter(username__startswith='pw').exists())
+
+
+class EncryptionTests(TestCase):
+    def test_round_trip_legacy_and_tampering(self):
+        token = encrypt_text('12 Elm St')
+        self.assertTrue(token.startswith('enc1$'))
+        self.assertNotEqual(token, encrypt_text('12 Elm St'))
+        legacy = base64.b64encode(b'3 Oak Ave').decode()
+        self.assertEqual(decrypt_many([token, legacy]), ['12 Elm St', '3 Oak Ave'])
+        middle = len(token) // 2
+        tampered = token[:middle] + ('A' if token[middle] != 'A' else 'B') + token[middle + 1:]
+        with self.assertRaises(DecryptionError):
+            decrypt_text(tampered)
+        self.assertEqual(decrypt_many([tampered], default='?'), ['?'])
+
+    def test_rotation_reencrypts_legacy_and_old_key_rows(self):
+        student = make_user('rot1', 'student')
+        with override_settings(ENCRYPTION_KEY='old-key'):
+            profile = StudentProfile.objects.create(
+                user=student, full_name='Rot', age=20, contact_number='555',
+                address_encrypted=encrypt_text('1 Road'), guardian_email='g@example.com',
+            )
+        legacy = StudentProfile.objects.create(
+            user=make_user('rot2', 'student'), full_name='Legacy', age=20, contact_number='555',
+            address_encrypted=encrypt_text('2 Road'), guardian_email='g@example.com',
+        )
+        StudentProfile.objects.filter(pk=legacy.pk).update(address_encrypted=base64.b64encode(b'2 Road').decode())
+
+        with self.assertRaises(DecryptionError):
+            decrypt_text(StudentProfile.objects.get(pk=profile.pk).address_encrypted)
+        with override_settings(ENCRYPTION_OLD_KEYS=['old-key']):
+            call_command('rotate_encryption_key', batch_size=1, stdout=io.StringIO())
+        # Readable with the current key alone once rotated
+        values = StudentProfile.objects.order_by('pk').values_list('address_encrypted', flat=True)
+        self.assertEqual(decrypt_many(values), ['1 Road', '2 Road'])
+
+        self.client.force_login(User.objects.create(username='rotstaff', role='admin', is_staff=True, is_superuser=True))
+        self.assertContains(self.client.get(reverse('admin:MainApp_studentprofile_changelist')), '2 Road')
+
+
+class ProfileChangeTrackingTests(TestCase):
+    def test_saves_write_only_changed_columns(self):
+        StudentProfile.objects.create(
+            user=make_user('track1', 'student'), full_name='Track', age=20, contact_number='555',
+            address_encrypted=encrypt_text('1 Road'), guardian_email='g@example.com',
+        )
+        profile = StudentProfile.objects.get(full_name='Track')
+        ciphertext = profile.address_encrypted
+        with self.assertNumQueries(0):
+            profile.save()
+
+        profile.age = 21
+        with CaptureQueriesContext(connection) as captured:
+            profile.save()
+        updates = [q['sql'] for q in captured.captured_queries if 'MainApp_studentprofile' in q['sql']]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"age"', updates[0])
+        self.assertNotIn('"address_encrypted"', updates[0])
+        self.assertFalse(any('MainApp_searchdocument' in q['sql'] for q in captured.captured_queries))
+        self.assertEqual(StudentProfile.objects.get(pk=profile.pk).address_encrypted, ciphertext)
+
+        profile.address_encrypted = encrypt_text('<script>x</script>2 Road')
+        profile.save()
+        self.assertEqual(StudentProfile.objects.get(pk=profile.pk).get_decrypted_address(), '&lt;script&gt;x&lt;/script&gt;2 Road')
+
+
+class SanitizeTests(TestCase):
+    def test_policies_fast_path_and_batches(self):
+        values = ['Plain name', 'a\r\nb', '<b>bold</b> & co', None]
+        self.assertEqual(sanitize_many(values, RICH), [bleach.clean(v) if v else v for v in values])
+        self.assertEqual(sanitize('<b>bold</b>'), '&lt;b&gt;bold&lt;/b&gt;')
+        rows = sanitize_rows([{'full_name': '<i>x</i>', 'bio': '<i>x</i>'}], ['full_name', 'bio'])
+        self.assertEqual(rows, [{'full_name': '&lt;i&gt;x&lt;/i&gt;', 'bio': '<i>x</i>'}])
+
+
+class DocumentStorageTests(TestCase):
+    PDF = b'%PDF-1.4 minimal test document'
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def _profile(self, username, **files):
+        return StudentProfile.objects.create(
+            user=make_user(username, 'student'), full_name=username, age=20, contact_number='555',
+            address_encrypted=encrypt_text('1 Road'), guardian_email='g@example.com', **files,
+        )
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        first = self._profile('doc1', transcript=SimpleUploadedFile('a.pdf', self.PDF))
+        second = self._profile('doc2', transcript=SimpleUploadedFile('copy_xYz.pdf', self.PDF))
+        self.assertEqual(first.transcript.name, second.transcript.name)
+        blob = StoredBlob.objects.get()
+        self.assertEqual((blob.ref_count, blob.content_type), (2, 'application/pdf'))
+
+        second.delete()
+        first.transcript = None
+        first.save()
+        self.assertEqual(StoredBlob.objects.get().ref_count, 0)
+        call_command('gc_blobs', grace_hours=0, stdout=io.StringIO())
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertFalse(document_storage.exists(blob.name))
+
+    @override_settings(THUMBNAIL_ASYNC=False)
+    def test_thumbnails_are_generated_after_commit(self):
+        picture = io.BytesIO()
+        Image.new('RGBA', (800, 600), (255, 0, 0, 128)).save(picture, 'PNG')
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = self._profile('thumb1', profile_picture=SimpleUploadedFile('me.png', picture.getvalue()))
+        url = thumbnail(profile.profile_picture, 'small')
+        self.assertTrue(url.endswith('.thumb-small.jpg'))
+        with Image.open(os.path.join(settings.MEDIA_ROOT, thumbnail_name(profile.profile_picture.name, 'small'))) as thumb:
+            self.assertEqual(thumb.size, (100, 75))
+
+    def test_protected_media_access_and_ranges(self):
+        profile = self._profile('media1', transcript=SimpleUploadedFile('t.pdf', self.PDF))
+        url = profile.transcript.url
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(make_user('media2', 'student'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Dot segments must not slip another student's document past the prefix check
+        for dots in ('..', '%2e%2e', '.%2E'):
+            self.assertEqual(self.client.get(f'/media/profile_pics/{dots}/{profile.transcript.name}').status_code, 404)
+
+        self.client.force_login(profile.user)
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), self.PDF)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        partial = self.client.get(url, HTTP_RANGE='bytes=5-7')
+        self.assertEqual((partial.status_code, partial['Content-Range']), (206, f'bytes 5-7/{len(self.PDF)}'))
+        self.assertEqual(b''.join(partial.streaming_content), self.PDF[5:8])
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=999-').status_code, 416)
+
+    def test_file_type_comes_from_content(self):
+        fake = SimpleUploadedFile('evil.pdf', b'#!/bin/sh\necho hi', content_type='application/pdf')
+        with self.assertRaises(ValidationError):
+            self._profile('doc3', transcript=fake)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.teacher = make_user('expteacher', 'teacher')
+        self.course = Course.objects.create(name='Exports', code='EXP101', teacher=self.teacher)
+        other = Course.objects.create(name='Other', code='OTH101')
+        for i, (course, status) in enumerate([(self.course, 'approved'), (self.course, 'pending'), (other, 'approved')]):
+            student = make_user(f'exp{i}', 'student')
+            StudentProfile.objects.create(
+                user=student, full_name='=HYPERLINK("x")' if i == 0 else f'Student {i}', age=20,
+                contact_number='555', address_encrypted=encrypt_text('1 Road'), guardian_email='g@example.com',
+            )
+            Enrollment.objects.create(student=student, course=course, status=status)
+
+    def _rows(self, response):
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+    def test_teacher_roster_csv_and_xlsx(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('teacher_course_students_export', args=[self.course.id, 'csv']))
+        self.assertTrue(response.streaming)
+        rows = self._rows(response)
+        self.assertEqual(rows[0][:2], ['Username', 'Full name'])
+        # Only approved students, with formula-looking values neutralised
+        self.assertEqual([row[:2] for row in rows[1:]], [['exp0', '\'=HYPERLINK("x")']])
+
+        response = self.client.get(reverse('teacher_course_students_export', args=[self.course.id, 'xlsx']))
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as workbook:
+            self.assertIn('exp0', workbook.read('xl/worksheets/sheet1.xml').decode())
+        self.assertEqual(self.client.get(reverse('teacher_course_students_export', args=[self.course.id, 'pdf'])).status_code, 404)
+
+        Course.objects.filter(pk=self.course.pk).update(code='Ré"101')
+        response = self.client.get(reverse('teacher_course_students_export', args=[self.course.id, 'csv']))
+        self.assertEqual(response['Content-Disposition'], "attachment; filename*=utf-8''R%C3%A9%22101-roster.csv")
+
+    def test_admin_export_filters(self):
+        self.client.force_login(make_user('expadmin', 'admin'))
+        url = reverse('enrollment_export', args=['csv'])
+        self.assertEqual(len(self._rows(self.client.get(url))), 4)
+        rows = self._rows(self.client.get(url, {'course': self.course.id, 'status': 'approved'}))
+        self.assertEqual([row[1] for row in rows[1:]], ['exp0'])
+        self.assertEqual(len(self._rows(self.client.get(url, {'requested_to': '2000-01-01'}))), 1)
+        self.assertEqual(self.client.get(url, {'status': 'bogus'}).status_code, 400)
+
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class KeysetPaginationTests(TestCase):
+    def test_walks_forward_and_back_without_gaps(self):
+        teacher = make_user('t1', 'teacher')
+        Course.objects.bulk_create(Course(name=f'C{i}', code=f'C{i:03}', teacher=teacher) for i in range(7))
+        queryset = Course.objects.all()
+
+        seen, page = [], paginate_keyset(queryset, ('code',), per_page=3)
+        self.assertFalse(page.has_previous)
+        while True:
+            seen.extend(c.code for c in page)
+            if not page.has_next:
+                break
+            page = paginate_keyset(queryset, ('code',), page.next_cursor, per_page=3)
+        self.assertEqual(seen, [f'C{i:03}' for i in range(7)])
+
+        back = paginate_keyset(queryset, ('code',), page.previous_cursor, per_page=3)
+        self.assertEqual([c.code for c in back], ['C003', 'C004', 'C005'])
+        self.assertTrue(back.has_next and back.has_previous)
+
+    def test_course_list_follows_next_link(self):
+        teacher = make_user('t2', 'teacher')
+        Course.objects.bulk_create(Course(name=f'C{i}', code=f'D{i:03}', teacher=teacher) for i in range(30))
+        self.client.force_login(make_user('viewer', 'student'))
+        response = self.client.get(reverse('course_list'))
+        self.assertEqual(len(response.context['courses']), 25)
+        response = self.client.get(reverse('course_list') + response.context['courses'].next_querystring)
+        self.assertEqual([c.code for c in response.context['courses']], [f'D{i:03}' for i in range(25, 30)])
+
+
+class SearchTests(TestCase):
+    def test_index_follows_saves_and_deletes(self):
+        course = Course.objects.create(name='Organic Chemistry', code='CHEM210', description='Carbon compounds')
+        Course.objects.create(name='Chemistry Lab', code='CHEM101')
+        self.assertEqual(search_ids('course', 'organ chem'), [course.id])
+        self.assertEqual(search_ids('course', 'carbon'), [course.id])
+
+        course.name = 'Inorganic Chemistry'
+        course.save()
+        self.assertEqual(search_ids('course', 'inorg'), [course.id])
+        course.delete()
+        self.assertEqual(search_ids('course', 'carbon'), [])
+
+    def test_admin_queue_filters_by_student_search(self):
+        course = Course.objects.create(name='Art', code='ART100')
+        alice, bob = make_user('alice', 'student'), make_user('bob', 'student')
+        Enrollment.objects.create(student=alice, course=course)
+        Enrollment.objects.create(student=bob, course=course)
+        self.client.force_login(make_user('root', 'admin'))
+        response = self.client.get(reverse('admin_enrollment_requests'), {'student': 'ali'})
+        self.assertEqual([e.student for e in response.context['pending']], [alice])
+
+    def test_filter_subquery_is_not_capped(self):
+        SearchDocument.objects.bulk_create(
+            SearchDocument(kind='student', object_id=i, content=f'chen{i}') for i in range(SEARCH_LIMIT + 1)
+        )
+        self.assertEqual(len(search_ids('student', 'chen')), SEARCH_LIMIT)
+        self.assertEqual(matching('student', 'chen').count(), SEARCH_LIMIT + 1)
+        self.assertFalse(matching('student', '--').exists())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedSessionTests(TestCase):
+    def test_reads_hit_cache_and_unchanged_saves_skip_database(self):
+        store = SessionStore()
+        store['_auth_user_id'] = '1'
+        store.create()
+
+        with self.assertNumQueries(0):
+            session = SessionStore(store.session_key)
+            self.assertEqual(session['_auth_user_id'], '1')
+            session['_auth_user_id'] = '1'
+            session.save()
+        session['theme'] = 'dark'
+        session.save()
+        self.assertEqual(Session.objects.get().get_decoded(), {'_auth_user_id': '1', 'theme': 'dark'})
+
+    def test_purge_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(Session(session_key=f'old{i}', session_data='', expire_date=past) for i in range(3))
+        Session.objects.create(session_key='current', session_data='', expire_date=timezone.now() + timedelta(days=1))
+        self.assertEqual(purge_expired_sessions(batch_size=2), 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_go_to_replica_unless_pinned(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Course), 'default')  # outside a request
+        with request_routing():
+            self.assertEqual(router.db_for_read(Course), 'replica')
+            self.assertEqual(router.db_for_read(Session), 'default')
+            with primary():
+                self.assertEqual(router.db_for_read(Course), 'default')
+            self.assertEqual(router.db_for_read(Course), 'replica')
+
+    def test_clients_read_their_own_writes(self):
+        routed = []
+
+        def view(request):
+            routed.append(ReplicaRouter().db_for_read(Course))
+            if request.GET.get('write'):
+                ReplicaRouter().db_for_write(Course)
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(view)
+        factory = RequestFactory()
+        cookie = middleware(factory.get('/', {'write': '1'})).cookies['primary_until']
+        middleware(factory.post('/'))
+        sticky = factory.get('/')
+        sticky.COOKIES['primary_until'] = cookie.value
+        middleware(sticky)
+        self.assertEqual(routed, ['replica', 'default', 'default'])
+        self.assertNotIn('primary_until', middleware(factory.get('/')).cookies)
+
+
+class BackgroundLoggingTests(TestCase):
+    def test_records_are_written_as_json_off_thread(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JsonFormatter())
+        handler = BackgroundHandler(target, maxsize=2)
+        logger = logging.getLogger('MainApp.tests.background')
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+        logger.addHandler(handler)
+
+        # No listener yet, so the queue fills and the third record is dropped, not waited on
+        logger.warning("Rate limit exceeded on login by IP: %s", '10.0.0.1', extra={'ip': '10.0.0.1'})
+        logger.warning("queued")
+        logger.warning("dropped")
+        self.assertEqual(handler.dropped, 1)
+        handler.start()
+        handler.queue.join()
+        logger.warning("after")
+        handler.stop()
+
+        entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(entries[0]['message'], "Rate limit exceeded on login by IP: 10.0.0.1")
+        self.assertEqual((entries[0]['level'], entries[0]['ip']), ('WARNING', '10.0.0.1'))
+        self.assertEqual([entry['message'] for entry in entries[1:]], [
+            "queued", "Dropped 1 log records while the log queue was full.", "after",
+        ])
+
+
+class RequestMetricsTests(TestCase):
+    def test_server_timing_header_and_query_budget(self):
+        self.client.force_login(make_user('metrics', 'student'))
+        with self.assertLogs('MainApp.metrics', 'WARNING') as logs, self.settings(REQUEST_METRICS_QUERY_BUDGET=1):
+            response = self.client.get(reverse('course_list'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn('Query budget exceeded: course_list', logs.output[0])
+
+
+class DatabasePoolMetricsTests(TestCase):
+    def test_admin_only_json(self):
+        self.client.force_login(make_user('pooladmin', 'admin'))
+        response = self.client.get(reverse('db_pool_metrics'))
+        # The SQLite test database has no pool
+        self.assertEqual(response.json(), {'pid': os.getpid(), 'pools': {}})
+        self.client.force_login(make_user('poolstudent', 'student'))
+        self.assertRedirects(self.client.get(reverse('db_pool_metrics')), reverse('dashboard'), fetch_redirect_response=False)
+
+
+class OutboxConcurrencyTests(TransactionTestCase):
+    def test_writes_commit_while_a_send_is_blocked(self):
+        queue_email('Subject', 'Body', 'stud1@example.com')
+        sending, release = threading.Event(), threading.Event()
+        results = []
+
+        class SlowConnection:
+            def open(self):
+                pass
+
+            def close(self):
+                pass
+
+            def send_messages(self, messages):
+                sending.set()
+                release.wait(10)
+                return len(messages)
+
+        def send():
+            try:
+                results.append(send_queued_batch(connection=SlowConnection()))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        try:
+            self.assertTrue(sending.wait(10))
+            # Fails with "database table is locked" if the sender holds a transaction
+            make_user('writer', 'student')
+            self.assertEqual(OutboundEmail.objects.get().status, 'pending')
+            # The claimed row is leased, so a second worker leaves it alone
+            self.assertEqual(send_queued_batch(), (0, 0))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(results, [(1, 0)])
+        self.assertEqual(OutboundEmail.objects.get().status, 'sent')
+
+
+class ConcurrentApprovalTests(TransactionTestCase):
+    def test_concurrent_approvals_never_overfill(self):
+        course = Course.objects.create(name='Rush', code='RUSH101', capacity=5)
+        pending = [
+            Enrollment.objects.create(
+                student=make_user(f'r{i}', 'student'),
+                course=course,
+            )
+            for i in range(20)
+        ]
+        start = threading.Barrier(len(pending))
+        results = []
+
+        def approve(enrollment_id):
+            start.wait()
+            deadline = monotonic() + 30
+            try:
+                while monotonic() < deadline:
+                    try:
+                        enrollment = Enrollment.objects.get(pk=enrollment_id)
+                        enrollment.status = 'approved'
+                        enrollment.save()
+                        results.append('approved')
+                        return
+                    except CourseFull:
+                        results.append('full')
+                        return
+                    except OperationalError:
+                        # The in-memory test database reports table locks at once instead
+                        # of waiting out the busy timeout; back off and retry
+                        sleep(0.005)
+                results.append('gave up')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=approve, args=(e.id,)) for e in pending]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        course.refresh_from_db()
+        self.assertEqual(results.count('gave up'), 0)
+        self.assertEqual(results.count('approved'), 5)
+        self.assertEqual(course.approved_count, 5)
+        self.assertEqual(Enrollment.objects.filter(course=course, status='approved').count(), 5)
+
+
+def _use_worker_database(name):
+    # Runs in each forked worker; an in-memory test database cannot be shared, so
+    # workers switch to a file
+    if name:
+        connection.settings_dict = {**connection.settings_dict, 'NAME': name}
+    connection.close()
+
+
+def _create_counter_table():
+    with connection.schema_editor() as editor:
+        editor.create_model(RateLimitCounter)
+
+
+def _hit_many(times):
+    return [hit('shared', 60, now=60_000_000) for _ in range(times)]
+
+
+class RateLimitTests(TransactionTestCase):
+    def test_login_limit_and_purge(self):
+        # Captured so the test does not write to logs/ratelimit.log
+        with self.assertLogs('ratelimit', 'WARNING') as logs:
+            statuses = [self.client.get(reverse('login')).status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(logs.output, ['WARNING:ratelimit:Rate limit exceeded on login by IP: 127.0.0.1'])
+
+        hit('stale', 60, now=60)
+        self.assertEqual(purge_expired(batch_size=1), 1)
+        self.assertEqual(list(RateLimitCounter.objects.values_list('key', flat=True)), ['MainApp.views.login_view:60:127.0.0.1'])
+
+    def test_worker_processes_share_counts(self):
+        database = None
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            database = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'ratelimit.sqlite3')
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(4, _use_worker_database, (database,)) as pool:
+            if database:
+                pool.apply(_create_counter_table)
+            counts = [count for counts in pool.map(_hit_many, [25] * 4) for count in counts]
+        # Every increment was seen exactly once across the four processes
+        self.assertEqual(sorted(counts), list(range(1, 101)))
@@ -0,0 +1,95 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from MainApp.models import StoredBlob, StudentProfile
+from MainApp.storage import document_storage
+from MainApp.utils.thumbnails import delete_thumbnails
+
+logger = logging.getLogger(__name__)
+
+# StudentProfile fields stored in ContentAddressedStorage
+DOCUMENT_FIELDS = ('transcript', 'id_proof')
+
+
+def adjust_references(names, delta):
+    """Add ``delta`` to the reference count of each blob in ``names``; repeats count twice."""
+    for name, count in Counter(name for name in names if name).items():
+        StoredBlob.objects.filter(name=name).update(ref_count=F('ref_count') + delta * count)
+
+
+def recount():
+    """Recompute every ref_count from the profiles; returns the number of corrected blobs."""
+    counts = Counter(
+        name
+        for names in StudentProfile.objects.values_list(*DOCUMENT_FIELDS).iterator()
+        for name in names if name
+    )
+    with transaction.atomic():
+        wrong = [
+            blob for blob in StoredBlob.objects.select_for_update().only('pk', 'name', 'ref_count')
+            if blob.ref_count != counts.get(blob.name, 0)
+        ]
+        for blob in wrong:
+            blob.ref_count = counts.get(blob.name, 0)
+        StoredBlob.objects.bulk_update(wrong, ['ref_count'])
+    return len(wrong)
+
+
+def collect_garbage(grace=timedelta(hours=24), dry_run=False):
+    """
+    Delete blobs nobody references that were not uploaded or reused within ``grace``;
+    the grace period covers uploads whose profile has not been saved yet. Returns
+    (blob count, bytes freed).
+    """
+    cutoff = timezone.now() - grace
+    candidates = StoredBlob.objects.filter(ref_count__lte=0, last_used_at__lt=cutoff)
+    if dry_run:
+        return len(candidates), sum(blob.size for blob in candidates)
+    removed, freed = 0, 0
+    for blob in candidates.iterator():
+        # Re-checked in the DELETE itself, so a blob reused meanwhile is kept
+        deleted, _ = StoredBlob.objects.filter(pk=blob.pk, ref_count__lte=0, last_used_at__lt=cutoff).delete()
+        if deleted:
+            document_storage.delete(blob.name)
+            delete_thumbnails(blob.name)
+            removed += 1
+            freed += blob.size
+    return removed, freed
+
+
+def adopt_legacy_files(dry_run=False):
+    """
+    Move documents saved before deduplication into the blob store and delete the old
+    copies once no profile uses them. Returns the number of profile fields moved.
+    """
+    moved, legacy_names = 0, set()
+    profiles = StudentProfile.objects.exclude(**{f'{field}__startswith': document_storage.prefix for field in DOCUMENT_FIELDS})
+    for profile in profiles.iterator():
+        for field in DOCUMENT_FIELDS:
+            file = getattr(profile, field)
+            if not file or file.name.startswith(document_storage.prefix + '/'):
+                continue
+            if not document_storage.exists(file.name):
+                logger.warning("Profile %s: %s %s is missing on disk.", profile.pk, field, file.name)
+                continue
+            moved += 1
+            if dry_run:
+                continue
+            legacy_names.add(file.name)
+            with document_storage.open(file.name) as handle:
+                file.name = document_storage.save(file.name, File(handle))
+        if not dry_run:
+            profile.save()
+
+    referenced = set()
+    for field in DOCUMENT_FIELDS:
+        referenced.update(StudentProfile.objects.filter(**{f'{field}__in': legacy_names}).values_list(field, flat=True))
+    for name in legacy_names - referenced:
+        document_storage.delete(name)
+    return moved
@@ -0,0 +1,96 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from MainApp.models import Course, Enrollment, ScheduleSlot, StudentProfile, TeacherProfile
+from MainApp.utils.schedule import find_conflicts
+
+logger = logging.getLogger(__name__)
+
+
+def _version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def dashboard_version(user_id):
+    """
+    Current cache version of a user's dashboard. Versions are timestamps rather than
+    counters so an evicted version key can never bring back an older cached entry.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_dashboards(user_ids):
+    """Move the given users' dashboards to a new version; old entries simply expire."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        version = time.time_ns()
+        cache.set_many({_version_key(user_id): version for user_id in user_ids}, None)
+
+
+def dashboard_context(user):
+    """
+    Template context for the role dashboard, cached per user and version. Returns
+    (context, version); the version also keys the template fragment cache.
+    """
+    version = dashboard_version(user.pk)
+    key = f'dashboard:context:{user.pk}:{version}'
+    context = cache.get(key)
+    if context is None:
+        context = _build_context(user)
+        cache.set(key, context, settings.DASHBOARD_CACHE_TIMEOUT)
+    return context, version
+
+
+def _build_context(user):
+    if user.role == 'student':
+        counts = dict.fromkeys(('approved', 'pending'), 0)
+        counts.update(Enrollment.objects.filter(student=user, status__in=counts).values_list('status').annotate(n=Count('id')))
+        return {'profile': _student_profile(user), 'enrollment_counts': counts}
+    if user.role == 'teacher':
+        return {
+            'profile': _teacher_profile(user),
+            'courses': list(Course.objects.filter(teacher=user).order_by('code')),
+            # Overlapping slots across the teacher's own courses
+            'double_bookings': find_conflicts(ScheduleSlot.objects.filter(course__teacher=user).select_related('course')),
+        }
+    return {}
+
+
+def _student_profile(user):
+    try:
+        return user.student_profile
+    except StudentProfile.DoesNotExist:
+        logger.warning("No student profile found for %s, creating one.", user.username)
+        return StudentProfile.objects.create(
+            user=user,
+            full_name=user.get_full_name() or user.username,
+            age=18,  # Default age
+            contact_number="",
+            address_encrypted="",
+            guardian_email=user.email or "",
+        )
+
+
+def _teacher_profile(user):
+    try:
+        return user.teacher_profile
+    except TeacherProfile.DoesNotExist:
+        logger.warning("No teacher profile found for %s, creating one.", user.username)
+        return TeacherProfile.objects.create(
+            user=user,
+            full_name=user.get_full_name() or user.username,
+            department="",
+            contact_email=user.email or "",
+            office_location="",
+            bio="",
+        )
@@ -0,0 +1,14 @@
+from django.db import connections
+
+
+def pool_stats():
+    """
+    psycopg pool counters of this worker process, per pooled database alias: pool size,
+    idle connections, waiting requests, total wait time and so on (psycopg_pool's
+    get_stats()). Each gunicorn worker has its own pools.
+    """
+    stats = {}
+    for alias in connections:
+        if connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            stats[alias] = connections[alias].pool.get_stats()
+    return stats
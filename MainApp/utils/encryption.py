@@ -1,8 +1,100 @@
 import base64
+import binascii
+import hashlib
+import os
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Ciphertext format: enc1$<key id>$<urlsafe base64 of nonce + ciphertext + tag>.
+# Rows without the prefix are the original base64-only values and are still readable.
+PREFIX = 'enc1'
+NONCE_BYTES = 12
+
+
+class DecryptionError(ValueError):
+    pass
+
+
+class _Key:
+    def __init__(self, secret):
+        material = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=b'MainApp address encryption',
+        ).derive(secret.encode('utf-8'))
+        # Identifies which key wrote a value, so old keys can be kept for reading during rotation
+        self.id = hashlib.sha256(b'key-id' + material).hexdigest()[:8]
+        self.header = f'{PREFIX}${self.id}$'
+        self.cipher = AESGCM(material)
+
+
+@lru_cache(maxsize=None)
+def _keyring():
+    """(current key, {key id: key}) built from ENCRYPTION_KEY and ENCRYPTION_OLD_KEYS."""
+    current = _Key(settings.ENCRYPTION_KEY)
+    keys = {old.id: old for old in (_Key(secret) for secret in settings.ENCRYPTION_OLD_KEYS if secret)}
+    keys[current.id] = current
+    return current, keys
+
+
+@receiver(setting_changed)
+def _reset_keyring(setting, **kwargs):
+    if setting in ('ENCRYPTION_KEY', 'ENCRYPTION_OLD_KEYS'):
+        _keyring.cache_clear()
+
+
+def current_header():
+    """Prefix of every value written with the current key."""
+    return _keyring()[0].header
+
 
 def encrypt_text(text):
-    # Simple base64 encoding as an example
-    encrypted_text = base64.b64encode(text.encode('utf-8')).decode('utf-8')
-    return encrypted_text
+    key = _keyring()[0]
+    nonce = os.urandom(NONCE_BYTES)
+    # The header is authenticated too, so a value cannot be relabelled with another key id
+    sealed = key.cipher.encrypt(nonce, text.encode('utf-8'), key.header.encode('ascii'))
+    return key.header + base64.urlsafe_b64encode(nonce + sealed).decode('ascii')
+
+
 def decrypt_text(encrypted_text):
-    return base64.b64decode(encrypted_text).decode('utf-8')
\ No newline at end of file
+    return _decrypt(encrypted_text, _keyring()[1])
+
+
+def decrypt_many(values, default=None):
+    """
+    Decrypt a batch of values, e.g. one changelist page or export chunk. Values that cannot
+    be decrypted become ``default`` when one is given; otherwise DecryptionError is raised.
+    """
+    keys = _keyring()[1]
+    results = []
+    for value in values:
+        try:
+            results.append(_decrypt(value, keys))
+        except DecryptionError:
+            if default is None:
+                raise
+            results.append(default)
+    return results
+
+
+def _decrypt(value, keys):
+    if not value.startswith(PREFIX + '$'):
+        try:
+            return base64.b64decode(value, validate=True).decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            raise DecryptionError("Value is neither encrypted nor legacy base64.")
+    key_id, _, payload = value[len(PREFIX) + 1:].partition('$')
+    key = keys.get(key_id)
+    if key is None:
+        raise DecryptionError(f"No key with id {key_id}; add the old key to ENCRYPTION_OLD_KEYS.")
+    try:
+        data = base64.urlsafe_b64decode(payload)
+        plain = key.cipher.decrypt(data[:NONCE_BYTES], data[NONCE_BYTES:], key.header.encode('ascii'))
+    except (binascii.Error, ValueError, InvalidTag):
+        raise DecryptionError("Value was tampered with or is corrupt.")
+    return plain.decode('utf-8')
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from MainApp.models import Course, Enrollment
+from MainApp.utils.dashboard import invalidate_dashboards
+from MainApp.utils.outbox import queue_emails
+
+DECISIONS = {
+    'approve': 'approved',
+    'deny': 'denied',
+}
+
+
+def approved_count_expression():
+    """Expression computing a course's approved enrollments, for annotate()/update() on Course."""
+    return Coalesce(
+        Subquery(
+            Enrollment.objects.filter(course=OuterRef('pk'), status='approved')
+            .values('course').annotate(n=Count('id')).values('n')
+        ),
+        0,
+    )
+
+
+def decision_email(enrollment, decision, note, reviewer_label):
+    subject = f"Enrollment {decision.title()} for {enrollment.course.name}"
+    message = f"Dear {enrollment.student.username},\n\nYour enrollment request for {enrollment.course.name} has been {decision}."
+    if note:
+        message += f"\n\nNote from {reviewer_label}: {note}"
+    message += "\n\nThank you."
+    return subject, message, enrollment.student.email
+
+
+def review_enrollments(queryset, enrollment_ids, action, reviewer, note='', reviewer_label='admin'):
+    """
+    Approve or deny many pending enrollments in one transaction.
+
+    ``queryset`` scopes what the reviewer may touch (e.g. a teacher's own courses).
+    Rows are updated with a single UPDATE per decision, capacity is checked once
+    per affected course, and notifications go to the outbox.
+    Returns a (decided, skipped) tuple of enrollment lists; skipped rows did not
+    fit in their course.
+    """
+    decision = DECISIONS.get(action)
+    if decision is None or not enrollment_ids:
+        return [], []
+
+    with transaction.atomic():
+        decided = list(
+            queryset.select_for_update(of=('self',))
+            .filter(id__in=enrollment_ids, status='pending')
+            .select_related('student', 'course')
+            .order_by('requested_at', 'id')
+        )
+        skipped = []
+        if decision == 'approved':
+            decided, skipped = _fit_capacity(decided)
+        if not decided:
+            return decided, skipped
+
+        now = timezone.now()
+        Enrollment.objects.filter(id__in=[e.id for e in decided]).update(
+            status=decision, reviewed_by=reviewer, reviewed_at=now, note=note,
+        )
+        for enrollment in decided:
+            enrollment.status = decision
+            enrollment.reviewed_by = reviewer
+            enrollment.reviewed_at = now
+            enrollment.note = note
+        queue_emails(decision_email(e, decision, note, reviewer_label) for e in decided)
+        # update() skips the Enrollment signals that normally invalidate these
+        invalidate_dashboards(e.student_id for e in decided)
+    return decided, skipped
+
+
+def _fit_capacity(enrollments):
+    # Oldest requests win when a course cannot take everyone
+    course_ids = {e.course_id for e in enrollments}
+    # Lock the affected courses so the seats we read stay ours until commit
+    available = {
+        course.id: course.seats_available
+        for course in Course.objects.select_for_update().filter(id__in=course_ids).only('id', 'capacity', 'approved_count')
+    }
+    taken = dict.fromkeys(course_ids, 0)
+    accepted, skipped = [], []
+    for enrollment in enrollments:
+        if taken[enrollment.course_id] < available[enrollment.course_id]:
+            taken[enrollment.course_id] += 1
+            accepted.append(enrollment)
+        else:
+            skipped.append(enrollment)
+    # Without row locks (SQLite) another writer can take the seats between our read and this
+    # update; that course's requests are then skipped rather than failing the whole review
+    full = {course_id for course_id, count in taken.items() if count and not Course.objects.reserve_seats(course_id, count)}
+    skipped += [e for e in accepted if e.course_id in full]
+    accepted = [e for e in accepted if e.course_id not in full]
+    return accepted, skipped
@@ -0,0 +1,207 @@
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+EXPORT_CHUNK_SIZE = 2000
+# Encoders hand bytes to the response in pieces of roughly this size
+FLUSH_BYTES = 64 * 1024
+
+
+class _Sink:
+    """Write-only, non-seekable buffer that is drained after every few rows."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(part.encode('utf-8') if isinstance(part, str) else part for part in self.parts)
+        self.parts, self.size = [], 0
+        return data
+
+
+class CsvEncoder:
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def __init__(self):
+        self.sink = _Sink()
+        self.writer = csv.writer(self.sink)
+
+    def start(self, header):
+        # The BOM makes Excel pick UTF-8 when opening the file
+        self.sink.write('\ufeff')
+        self.writer.writerow(header)
+        return self.sink.drain()
+
+    def row(self, values):
+        self.writer.writerow(['' if value is None else _csv_text(value) for value in values])
+        return self.sink.drain() if self.sink.size >= FLUSH_BYTES else b''
+
+    def finish(self):
+        return self.sink.drain()
+
+
+class XlsxEncoder:
+    """
+    Minimal SpreadsheetML writer: a single sheet of inline strings and numbers, zipped
+    on the fly. zipfile writes data descriptors when the target cannot seek, so nothing
+    but the current deflate window is held in memory.
+    """
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+
+    _STATIC_PARTS = {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="xl/workbook.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+            '</Relationships>'
+        ),
+    }
+    _WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+
+    def __init__(self, sheet_name='Export'):
+        self.sheet_name = sheet_name
+        self.sink = _Sink()
+        self.zip = zipfile.ZipFile(self.sink, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.sheet = None
+
+    def start(self, header):
+        for name, content in self._STATIC_PARTS.items():
+            self.zip.writestr(name, content)
+        # Sheet names are limited to 31 characters and may not contain []:*?/\
+        name = re.sub(r'[\[\]:*?/\\]', ' ', self.sheet_name)[:31]
+        self.zip.writestr('xl/workbook.xml', self._WORKBOOK.format(name=escape(name, {'"': '&quot;'})))
+        self.sheet = self.zip.open('xl/worksheets/sheet1.xml', 'w')
+        self.sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self.row(header)
+        return self.sink.drain()
+
+    def row(self, values):
+        self.sheet.write(('<row>' + ''.join(_cell(value) for value in values) + '</row>').encode('utf-8'))
+        return self.sink.drain() if self.sink.size >= FLUSH_BYTES else b''
+
+    def finish(self):
+        self.sheet.write(b'</sheetData></worksheet>')
+        self.sheet.close()
+        self.zip.close()
+        return self.sink.drain()
+
+
+ENCODERS = {encoder.extension: encoder for encoder in (CsvEncoder, XlsxEncoder)}
+
+# XML 1.0 forbids most control characters, which would make Excel reject the file
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text(value):
+    if isinstance(value, datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_text(value):
+    text = _text(value)
+    # Spreadsheets run cells starting with these as formulas; names and notes are user input
+    if isinstance(value, str) and text[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + text
+    return text
+
+
+def _cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_ILLEGAL_XML.sub("", _text(value)))}</t></is></c>'
+
+
+def export_response(request, queryset, columns, filename, fmt, sheet_name='Export'):
+    """
+    Stream ``queryset`` as a CSV or XLSX download. ``columns`` is a list of
+    (header, function of the object) pairs. Rows are fetched with iterator()/aiterator()
+    in chunks, so memory use does not grow with the row count.
+    """
+    encoder_class = ENCODERS.get(fmt)
+    if encoder_class is None:
+        raise Http404("Unknown export format.")
+    encoder = encoder_class(sheet_name) if encoder_class is XlsxEncoder else encoder_class()
+    header = [title for title, _ in columns]
+    getters = [getter for _, getter in columns]
+
+    # Django drains an iterator of the wrong kind into a list first, so ASGI needs an async one
+    if isinstance(request, ASGIRequest):
+        rows = ([get(obj) for get in getters] async for obj in queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE))
+        content = _aencode(encoder, header, rows)
+    else:
+        rows = ([get(obj) for get in getters] for obj in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        content = _encode(encoder, header, rows)
+
+    response = StreamingHttpResponse(content, content_type=encoder.content_type)
+    # Names can come from admin-entered text such as course codes; quotes and non-ASCII are encoded
+    response['Content-Disposition'] = content_disposition_header(True, f'{filename}.{encoder.extension}')
+    return response
+
+
+def _encode(encoder, header, rows):
+    yield encoder.start(header)
+    for values in rows:
+        chunk = encoder.row(values)
+        if chunk:
+            yield chunk
+    yield encoder.finish()
+
+
+async def _aencode(encoder, header, rows):
+    yield encoder.start(header)
+    async for values in rows:
+        chunk = encoder.row(values)
+        if chunk:
+            yield chunk
+    yield encoder.finish()
@@ -0,0 +1,122 @@
+import atexit
+import json
+import logging
+import logging.config
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listeners = []
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Waits for room: stopping must not be skipped because the queue is full
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, any ``extra`` fields and the traceback."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Puts records on a bounded in-memory queue for a QueueListener thread to format and
+    write. Messages are formatted on that thread too, so a logging call only costs the
+    enqueue. If the writer falls behind (a slow disk), records are dropped and counted
+    instead of blocking the caller.
+    """
+
+    def __init__(self, handler, maxsize):
+        super().__init__(queue.Queue(maxsize))
+        self.handler = handler
+        self.dropped = 0
+        self.setLevel(handler.level)
+        self.listener = None
+
+    def prepare(self, record):
+        # The listener is in this process, so the record needs no pickling-safe copy
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': "Dropped %d log records while the log queue was full.", 'args': (self.dropped,),
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        self.listener = _Listener(self.queue, self.handler, respect_handler_level=True)
+        self.listener.start()
+
+    def restart(self):
+        # A forked child has the queue but not the listener thread, and the queue's
+        # locks may have been held at fork time
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def configure(config):
+    """
+    LOGGING_CONFIG callable: applies ``config`` with dictConfig, then moves every
+    handler of the root logger and of the loggers it names behind a BackgroundHandler.
+    """
+    _stop_all()
+    _listeners.clear()
+    logging.config.dictConfig(config)
+    wrapped = {}
+    for logger in [logging.getLogger()] + [logging.getLogger(name) for name in config.get('loggers', {})]:
+        for handler in list(logger.handlers):
+            if isinstance(handler, BackgroundHandler):
+                continue
+            if handler not in wrapped:
+                wrapped[handler] = BackgroundHandler(handler, settings.LOG_QUEUE_SIZE)
+                wrapped[handler].start()
+                _listeners.append(wrapped[handler])
+            logger.removeHandler(handler)
+            logger.addHandler(wrapped[handler])
+
+
+def _stop_all():
+    # Writes out whatever is still queued
+    for handler in _listeners:
+        handler.stop()
+
+
+def _restart_all():
+    for handler in _listeners:
+        handler.restart()
+
+
+atexit.register(_stop_all)
+os.register_at_fork(after_in_child=_restart_all)
@@ -0,0 +1,179 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+from MainApp.models import StudentProfile
+from MainApp.utils.thumbnails import thumbnail_name
+
+CHUNK_SIZE = 64 * 1024
+# Types browsers may render in place; anything else is downloaded
+INLINE_TYPES = {'application/pdf', 'image/jpeg', 'image/png'}
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class MediaFileResponse(FileResponse):
+    block_size = CHUNK_SIZE
+
+
+class _FileRange:
+    """A file positioned at the range start that reads no further than the range end."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size > 0 else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets gunicorn use sendfile(); it starts at the current offset and stops at Content-Length
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_normalized(name):
+    """
+    True when ``name`` has no empty, '.' or '..' segments. Storage resolves those when
+    opening the file, so a prefix check on such a name would not apply to the file served.
+    """
+    return bool(name) and all(part not in ('', '.', '..') for part in name.split('/'))
+
+
+def can_view_media(user, name):
+    """Admins see everything, anyone signed in sees profile pictures, students their own documents."""
+    if not is_normalized(name):
+        return False
+    if user.role == 'admin' or user.is_staff:
+        return True
+    if name.startswith('profile_pics/'):
+        return True
+    if not name.startswith('documents/'):
+        return False
+    owned = StudentProfile.objects.filter(user=user).values_list('transcript', 'id_proof').first() or ()
+    owned = [document for document in owned if document]
+    return name in owned or any(
+        name == thumbnail_name(document, size) for document in owned for size in settings.THUMBNAIL_SIZES
+    )
+
+
+def serve_file(request, storage, name, immutable=False):
+    """
+    Serve a stored file with ETag/Last-Modified validation and single byte-range support.
+    With MEDIA_SENDFILE set, the front-end server sends the bytes instead.
+    """
+    try:
+        path = storage.path(name)
+        info = os.stat(path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found.")
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404("File not found.")
+
+    etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+    last_modified = int(info.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if settings.MEDIA_SENDFILE:
+            response = _offload(path, name, content_type)
+        else:
+            response = _stream(request, path, info.st_size, content_type, etag, last_modified)
+        response['Content-Disposition'] = content_disposition_header(
+            content_type not in INLINE_TYPES, os.path.basename(name),
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Content-addressed names never change content, so browsers need not revalidate them
+    if immutable:
+        patch_cache_control(response, private=True, max_age=365 * 24 * 3600, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _offload(path, name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel':
+        # nginx serves the internal location, including Range requests
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def _stream(request, path, size, content_type, etag, last_modified):
+    requested = _requested_range(request, size, etag, last_modified)
+    if requested == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    start, end = requested or (0, size - 1)
+    length = end - start + 1
+
+    file = open(path, 'rb')
+    file.seek(start)
+    # Django buffers a sync iterator into memory under ASGI, so ASGI gets an async one
+    if isinstance(request, ASGIRequest):
+        response = MediaFileResponse(_aread(file, length), content_type=content_type)
+    else:
+        response = MediaFileResponse(_FileRange(file, length), content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if requested:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def _requested_range(request, size, etag, last_modified):
+    """(start, end) of a satisfiable single range, 'unsatisfiable', or None for the whole file."""
+    header = request.headers.get('Range')
+    if not header or size == 0:
+        return None
+    # A range of an outdated copy would corrupt the client's file
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        return None
+    match = _RANGE.fullmatch(header.strip())
+    # Multiple or malformed ranges: sending the whole file is allowed
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        return (max(size - suffix, 0), size - 1) if suffix else 'unsatisfiable'
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return 'unsatisfiable'
+    return start, end
+
+
+async def _aread(file, length):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while length > 0:
+            data = await read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        file.close()
@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from MainApp.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, recipient, from_email=None):
+    """Store an email in the outbox; call inside the transaction that triggered it."""
+    if not recipient:
+        return None
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def queue_emails(messages, from_email=None):
+    """Bulk version of queue_email for an iterable of (subject, body, recipient)."""
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    return OutboundEmail.objects.bulk_create([
+        OutboundEmail(subject=subject, body=body, recipient=recipient, from_email=from_email)
+        for subject, body, recipient in messages
+        if recipient
+    ])
+
+
+def retry_delay(attempts):
+    # Exponential backoff: base, 2*base, 4*base, ... capped at OUTBOX_RETRY_MAX_SECONDS
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def send_queued_batch(batch_size=None, connection=None):
+    """
+    Send one batch of due outbox rows over a single mail connection.
+    Returns a (sent, failed) tuple.
+    """
+    batch = _claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    # No transaction is open from here on: SMTP round trips must not hold database locks
+    sent = failed = 0
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # The server is unreachable: every row in the batch counts as a failed attempt
+        logger.warning("Outbox could not open mail connection: %s", exc)
+        for email in batch:
+            _mark_failed(email, exc)
+        _save_results(batch)
+        return sent, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.recipient],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                _mark_failed(email, exc)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+    finally:
+        connection.close()
+        _save_results(batch)
+    return sent, failed
+
+
+def _claim_batch(batch_size):
+    # Leasing the rows (next_attempt_at pushed past the send) keeps other workers off them
+    # once the locks are released; a worker that dies mid-batch leaves them due again later
+    with transaction.atomic():
+        # skip_locked lets several workers claim at once without taking the same rows
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+    return batch
+
+
+def _save_results(batch):
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+
+def _mark_failed(email, exc):
+    email.attempts += 1
+    email.last_error = str(exc)[:1000]
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = 'dead'
+        logger.error("Outbox email %s moved to dead-letter after %s attempts: %s", email.pk, email.attempts, exc)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
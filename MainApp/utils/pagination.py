@@ -0,0 +1,142 @@
+from django.core import signing
+from django.db.models import Q
+from django.http import QueryDict
+
+DEFAULT_PER_PAGE = 25
+CURSOR_PARAM = 'cursor'
+_SALT = 'MainApp.keyset'
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset; iterate it like a list."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, query_dict=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self._query_dict = query_dict
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def _querystring(self, cursor):
+        # Keep the caller's filters (e.g. ?student=...) and swap in the new cursor
+        params = self._query_dict.copy() if self._query_dict is not None else QueryDict(mutable=True)
+        params[CURSOR_PARAM] = cursor
+        return '?' + params.urlencode()
+
+    @property
+    def next_querystring(self):
+        return self._querystring(self.next_cursor) if self.has_next else ''
+
+    @property
+    def previous_querystring(self):
+        return self._querystring(self.previous_cursor) if self.has_previous else ''
+
+
+def _split(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _seek_filter(fields, values, backwards):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), with the operator flipped per direction
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != backwards else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for (prev_name, _), prev_value in zip(fields[:i], values):
+            term &= Q(**{prev_name: prev_value})
+        condition |= term
+    return condition
+
+
+def encode_cursor(direction, values):
+    return signing.dumps([direction, values], salt=_SALT, compress=True)
+
+
+def decode_cursor(cursor, model, fields):
+    """Returns (direction, values) or None for a missing or tampered cursor."""
+    if not cursor:
+        return None
+    try:
+        direction, raw = signing.loads(cursor, salt=_SALT)
+        values = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, raw)]
+    except (signing.BadSignature, ValueError, TypeError, LookupError):
+        return None
+    if direction not in ('next', 'prev') or len(values) != len(fields):
+        return None
+    return direction, values
+
+
+def paginate_keyset(queryset, ordering, cursor=None, per_page=DEFAULT_PER_PAGE, query_dict=None):
+    """
+    Seek-paginate ``queryset`` by ``ordering`` (model field names, '-' for descending).
+    The last ordering field must be unique so every row has a distinct key. Never uses
+    OFFSET, so page N costs the same as page one given an index on the ordering.
+    """
+    queryset, fields, decoded = _seek(queryset, ordering, cursor)
+    return _page(list(queryset[:per_page + 1]), fields, decoded, per_page, query_dict)
+
+
+async def apaginate_keyset(queryset, ordering, cursor=None, per_page=DEFAULT_PER_PAGE, query_dict=None):
+    """Async counterpart of paginate_keyset for async views."""
+    queryset, fields, decoded = _seek(queryset, ordering, cursor)
+    return _page([obj async for obj in queryset[:per_page + 1]], fields, decoded, per_page, query_dict)
+
+
+def keyset_page(request, queryset, ordering, per_page=DEFAULT_PER_PAGE):
+    return paginate_keyset(
+        queryset, ordering, request.GET.get(CURSOR_PARAM), per_page=per_page, query_dict=request.GET,
+    )
+
+
+async def akeyset_page(request, queryset, ordering, per_page=DEFAULT_PER_PAGE):
+    return await apaginate_keyset(
+        queryset, ordering, request.GET.get(CURSOR_PARAM), per_page=per_page, query_dict=request.GET,
+    )
+
+
+def _seek(queryset, ordering, cursor):
+    fields = _split(ordering)
+    decoded = decode_cursor(cursor, queryset.model, fields)
+    if decoded is not None and decoded[0] == 'prev':
+        queryset = queryset.order_by(*[name if descending else f'-{name}' for name, descending in fields])
+    else:
+        queryset = queryset.order_by(*ordering)
+    if decoded is not None:
+        queryset = queryset.filter(_seek_filter(fields, decoded[1], decoded[0] == 'prev'))
+    return queryset, fields, decoded
+
+
+def _page(rows, fields, decoded, per_page, query_dict):
+    backwards = decoded is not None and decoded[0] == 'prev'
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key(obj):
+        return [getattr(obj, name) for name, _ in fields]
+
+    has_next = has_more if not backwards else True
+    has_previous = has_more if backwards else decoded is not None
+    return KeysetPage(
+        rows,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=encode_cursor('next', _serialize(key(rows[-1]))) if rows else None,
+        previous_cursor=encode_cursor('prev', _serialize(key(rows[0]))) if rows else None,
+        query_dict=query_dict,
+    )
+
+
+def _serialize(values):
+    return [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
@@ -0,0 +1,81 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from MainApp.models import Course, Enrollment, PrerequisiteClosure
+
+
+def compute_closure(edges, course_ids):
+    """
+    Transitive prerequisites for ``course_ids`` given direct (course, prerequisite) edges.
+    Returns a dict of course id -> set of prerequisite ids.
+    """
+    direct = defaultdict(set)
+    for course_id, prerequisite_id in edges:
+        direct[course_id].add(prerequisite_id)
+    closure = {}
+    for course_id in course_ids:
+        seen = set()
+        stack = list(direct[course_id])
+        while stack:
+            prerequisite_id = stack.pop()
+            if prerequisite_id not in seen:
+                seen.add(prerequisite_id)
+                stack.extend(direct[prerequisite_id])
+        closure[course_id] = seen
+    return closure
+
+
+def direct_edges():
+    return Course.prerequisites.through.objects.values_list('from_course_id', 'to_course_id')
+
+
+def dependents_of(course_ids):
+    return set(
+        PrerequisiteClosure.objects.filter(prerequisite_id__in=course_ids).values_list('course_id', flat=True)
+    )
+
+
+def rebuild_closure(course_ids):
+    """Recompute closure rows for ``course_ids`` and every course that depends on them."""
+    affected = set(course_ids) | dependents_of(course_ids)
+    if not affected:
+        return
+    closure = compute_closure(direct_edges(), affected)
+    with transaction.atomic():
+        PrerequisiteClosure.objects.filter(course_id__in=affected).delete()
+        PrerequisiteClosure.objects.bulk_create(
+            PrerequisiteClosure(course_id=course_id, prerequisite_id=prerequisite_id)
+            for course_id, prerequisites in closure.items()
+            for prerequisite_id in prerequisites
+        )
+
+
+def cyclic_prerequisites(course_id, prerequisite_ids):
+    """Prerequisite ids that would create a cycle if made prerequisites of ``course_id``."""
+    prerequisite_ids = set(prerequisite_ids)
+    cyclic = {course_id} & prerequisite_ids
+    if course_id is not None:
+        # prerequisite P closes a loop when P already (transitively) requires the course
+        cyclic |= set(
+            PrerequisiteClosure.objects.filter(course_id__in=prerequisite_ids, prerequisite_id=course_id)
+            .values_list('course_id', flat=True)
+        )
+    return cyclic
+
+
+def validate_prerequisites(course_id, prerequisite_ids):
+    cyclic = cyclic_prerequisites(course_id, prerequisite_ids)
+    if cyclic:
+        codes = ', '.join(Course.objects.filter(id__in=cyclic).order_by('code').values_list('code', flat=True))
+        raise ValidationError(f"Circular prerequisite: {codes} already depends on this course.")
+
+
+def missing_prerequisites(student, course):
+    """All transitive prerequisites of ``course`` the student has not been approved for, in one query."""
+    # One correlated EXISTS: exclude() across the enrollments relation would test student
+    # and status on possibly different enrollment rows
+    approved = Enrollment.objects.filter(course=OuterRef('pk'), student=student, status='approved')
+    return Course.objects.filter(dependent_closure__course=course).exclude(Exists(approved)).order_by('code')
@@ -0,0 +1,121 @@
+import hashlib
+import random
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django_ratelimit.exceptions import Ratelimited
+
+from MainApp.models import RateLimitCounter
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RATE = re.compile(r'(\d+)/(\d*)([smhd])')
+
+# One statement both creates and bumps a counter, so concurrent workers cannot lose an
+# increment. When the stored window is the previous one its count moves to
+# previous_count; anything older is dropped. A worker whose clock lags slightly behind
+# counts into the newer stored window. Needs PostgreSQL or SQLite 3.35+
+_UPSERT = """
+    INSERT INTO {table} ({key}, {window}, {count}, {previous}, {expires})
+    VALUES (%s, %s, 1, 0, %s)
+    ON CONFLICT ({key}) DO UPDATE SET
+        {previous} = CASE
+            WHEN {table}.{window} >= EXCLUDED.{window} THEN {table}.{previous}
+            WHEN {table}.{window} = EXCLUDED.{window} - 1 THEN {table}.{count}
+            ELSE 0 END,
+        {count} = CASE WHEN {table}.{window} >= EXCLUDED.{window} THEN {table}.{count} + 1 ELSE 1 END,
+        {expires} = CASE WHEN {table}.{window} >= EXCLUDED.{window} THEN {table}.{expires} ELSE EXCLUDED.{expires} END,
+        {window} = CASE WHEN {table}.{window} >= EXCLUDED.{window} THEN {table}.{window} ELSE EXCLUDED.{window} END
+    RETURNING {count}, {previous}
+"""
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60), '20/15m' -> (20, 900)."""
+    match = _RATE.fullmatch(rate)
+    if not match:
+        raise ValueError(f"Invalid rate: {rate!r}")
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def counter_key(group, period, value):
+    key = f'{group}:{period}:{value}'
+    return key if len(key) <= 255 else f'{group[:150]}:{period}:{hashlib.sha256(value.encode()).hexdigest()}'
+
+
+def hit(key, period, now=None):
+    """
+    Count one request for ``key`` and return the number of requests in the last
+    ``period`` seconds. It is a sliding-window estimate: the current fixed window's
+    count plus the previous window's, weighted by how much of it still overlaps.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    expires = datetime.fromtimestamp((window + 2) * period, tz=dt_timezone.utc)
+    expires = RateLimitCounter._meta.get_field('expires_at').get_db_prep_value(expires, connection)
+
+    qn = connection.ops.quote_name
+    sql = _UPSERT.format(
+        table=qn(RateLimitCounter._meta.db_table), key=qn('key'), window=qn('window'),
+        count=qn('count'), previous=qn('previous_count'), expires=qn('expires_at'),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [key, window, expires])
+        count, previous = cursor.fetchone()
+    overlap = 1 - (now - window * period) / period
+    return count + previous * overlap
+
+
+def purge_expired(batch_size=1000, max_batches=None):
+    """
+    Delete counters whose windows have both passed, ``batch_size`` rows per statement so
+    the table is never locked for long. Returns the number of rows deleted.
+    """
+    now = timezone.now()
+    deleted, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        ids = list(RateLimitCounter.objects.filter(expires_at__lt=now).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Re-checked in the DELETE itself, so a key hit meanwhile keeps its counts
+        deleted += RateLimitCounter.objects.filter(pk__in=ids, expires_at__lt=now).delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def ratelimit(key='ip', rate=None, block=False):
+    """
+    Limit a view to ``rate`` requests per client, counted in RateLimitCounter so every
+    worker shares the same counts. ``key`` is 'ip' or a callable taking the request.
+    Sets ``request.limited``; with ``block`` a limited request raises Ratelimited (403).
+    """
+    limit, period = parse_rate(rate)
+    key_func = client_ip if key == 'ip' else key
+
+    def decorator(view):
+        group = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLE:
+                limited = hit(counter_key(group, period, key_func(request)), period) > limit
+                request.limited = getattr(request, 'limited', False) or limited
+                # Expired keys are cleared a batch at a time by a fraction of requests
+                if random.random() < settings.RATELIMIT_PURGE_PROBABILITY:
+                    purge_expired(settings.RATELIMIT_PURGE_BATCH_SIZE, max_batches=1)
+                if limited and block:
+                    raise Ratelimited()
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
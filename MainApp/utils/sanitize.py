@@ -0,0 +1,68 @@
+import re
+import threading
+
+import bleach
+
+# Policies: PLAIN escapes all markup (names, phone numbers, emails, addresses); RICH keeps
+# bleach's default inline tags for free text such as a teacher's bio
+PLAIN = 'plain'
+RICH = 'rich'
+_POLICIES = {
+    PLAIN: {'tags': set(), 'attributes': {}},
+    RICH: {},
+}
+FIELD_POLICIES = {
+    'bio': RICH,
+}
+
+# Characters bleach changes: markup, and control characters it drops, replaces or
+# normalises (\r). A string without any of them comes back from bleach unchanged
+_NEEDS_CLEANING = re.compile('[\x00-\x08\x0b-\x1f&<>]')
+
+# Cleaner keeps parser state, so each thread gets its own instances
+_local = threading.local()
+
+
+def _cleaner(policy):
+    cleaners = getattr(_local, 'cleaners', None)
+    if cleaners is None:
+        cleaners = _local.cleaners = {}
+    if policy not in cleaners:
+        cleaners[policy] = bleach.Cleaner(**_POLICIES[policy])
+    return cleaners[policy]
+
+
+def policy_for(field):
+    return FIELD_POLICIES.get(field, PLAIN)
+
+
+def sanitize(value, policy=PLAIN):
+    """Sanitize one value; anything that is not a string is returned as is."""
+    if not isinstance(value, str) or not _NEEDS_CLEANING.search(value):
+        return value
+    return _cleaner(policy).clean(value)
+
+
+def sanitize_many(values, policy=PLAIN):
+    """Sanitize a list of values with one policy, e.g. a column of an import."""
+    search = _NEEDS_CLEANING.search
+    clean = _cleaner(policy).clean
+    return [clean(value) if isinstance(value, str) and search(value) else value for value in values]
+
+
+def sanitize_fields(data, fields):
+    """Return a copy of the dict ``data`` with ``fields`` sanitized by their field policy."""
+    cleaned = dict(data)
+    for field in fields:
+        if field in cleaned:
+            cleaned[field] = sanitize(cleaned[field], policy_for(field))
+    return cleaned
+
+
+def sanitize_rows(rows, fields):
+    """Sanitize ``fields`` in place across a batch of dict rows, one column at a time."""
+    for field in fields:
+        present = [row for row in rows if field in row]
+        for row, value in zip(present, sanitize_many([row[field] for row in present], policy_for(field))):
+            row[field] = value
+    return rows
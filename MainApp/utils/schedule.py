@@ -0,0 +1,189 @@
+import re
+from datetime import time
+
+from django.db.models import Exists, OuterRef
+
+from MainApp.models import ScheduleSlot
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+_DAY_ALIASES = {
+    'mon': 0, 'monday': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1,
+    'wed': 2, 'weds': 2, 'wednesday': 2,
+    'thu': 3, 'thur': 3, 'thurs': 3, 'thursday': 3,
+    'fri': 4, 'friday': 4,
+    'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)?'
+_SEGMENT = re.compile(rf'^(?P<days>[a-z/&\s]+?)\s+{_TIME}\s*-\s*{_TIME}$')
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_schedule(text):
+    """
+    Parse free-text schedules such as 'Mon 10-12, Wed 10-12' or 'Tue/Thu 2:30pm-4pm'
+    into (weekday, start, end) tuples. Hours 1-6 without am/pm are read as afternoon.
+    Raises ValueError for anything it cannot read.
+    """
+    slots = []
+    for segment in filter(None, (part.strip() for part in re.split(r'[,;]', text.lower()))):
+        match = _SEGMENT.match(segment)
+        if not match:
+            raise ValueError(f"Cannot read schedule segment '{segment}'.")
+        days = [token for token in re.split(r'[/&\s]+|\band\b', match.group('days')) if token]
+        try:
+            weekdays = [_DAY_ALIASES[token] for token in days]
+        except KeyError as exc:
+            raise ValueError(f"Unknown day '{exc.args[0]}' in schedule.") from None
+        start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()[1:]
+        start = _to_minutes(start_hour, start_minute, start_meridiem or end_meridiem)
+        end = _to_minutes(end_hour, end_minute, end_meridiem)
+        if end <= start and not end_meridiem:
+            end += 12 * 60  # '11-1' means 11:00-13:00
+        if not 0 <= start < end <= MINUTES_PER_DAY:
+            raise ValueError(f"Invalid time range in schedule segment '{segment}'.")
+        slots.extend((weekday, _to_time(start), _to_time(end)) for weekday in weekdays)
+    return slots
+
+
+def _to_minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    elif meridiem is None and 1 <= hour <= 6:
+        hour += 12
+    if hour > 24 or minute > 59:
+        raise ValueError("Invalid time in schedule.")
+    return hour * 60 + minute
+
+
+def _to_time(minutes):
+    # TimeField cannot hold 24:00; treat a midnight end as the last minute of the day
+    minutes = min(minutes, MINUTES_PER_DAY - 1)
+    return time(minutes // 60, minutes % 60)
+
+
+def sync_slots(course):
+    """Replace a course's slots with the parse of its schedule text; unreadable text leaves none."""
+    try:
+        parsed = parse_schedule(course.schedule or '')
+    except ValueError:
+        parsed = []
+    ScheduleSlot.objects.filter(course=course).delete()
+    ScheduleSlot.objects.bulk_create(
+        ScheduleSlot(course=course, weekday=weekday, start_time=start, end_time=end) for weekday, start, end in parsed
+    )
+
+
+def week_minutes(slot):
+    """(start, end) of a slot as minutes since Monday 00:00."""
+    base = slot.weekday * MINUTES_PER_DAY
+    return base + slot.start_time.hour * 60 + slot.start_time.minute, base + slot.end_time.hour * 60 + slot.end_time.minute
+
+
+def conflicting_slots(course, other_courses):
+    """Slots of ``other_courses`` overlapping any slot of ``course``, as a single query."""
+    overlapping = ScheduleSlot.objects.filter(
+        course=course, weekday=OuterRef('weekday'),
+        start_time__lt=OuterRef('end_time'), end_time__gt=OuterRef('start_time'),
+    )
+    return (
+        ScheduleSlot.objects.filter(Exists(overlapping), course__in=other_courses)
+        .exclude(course=course).select_related('course')
+    )
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over half-open [start, end) intervals, each carrying a payload.
+    Built once in O(n log n); overlapping() answers in O(log n + matches).
+    """
+
+    def __init__(self, intervals):
+        intervals = list(intervals)
+        self.center = None
+        if not intervals:
+            return
+        # Centering on a start point guarantees at least one interval stays at this node
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_start = sorted(here, key=lambda i: i[0])
+        self.by_end = sorted(here, key=lambda i: i[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def overlapping(self, start, end):
+        """Payloads of intervals overlapping [start, end)."""
+        found = []
+        stack = [self] if self.center is not None else []
+        while stack:
+            node = stack.pop()
+            if end <= node.center:
+                # Only intervals starting before ``end`` can overlap
+                for s, e, payload in node.by_start:
+                    if s >= end:
+                        break
+                    if e > start:
+                        found.append(payload)
+                if node.left:
+                    stack.append(node.left)
+            elif start > node.center:
+                for s, e, payload in node.by_end:
+                    if e <= start:
+                        break
+                    if s < end:
+                        found.append(payload)
+                if node.right:
+                    stack.append(node.right)
+            else:
+                # [start, end) contains the center, and so does every interval stored here
+                found.extend(payload for _, _, payload in node.by_start)
+                if node.left:
+                    stack.append(node.left)
+                if node.right:
+                    stack.append(node.right)
+        return found
+
+
+def find_conflicts(slots):
+    """Pairs of slots from different courses that overlap, e.g. a teacher's double bookings."""
+    slots = list(slots)
+    tree = IntervalTree((*week_minutes(slot), slot) for slot in slots)
+    pairs = []
+    for slot in slots:
+        for other in tree.overlapping(*week_minutes(slot)):
+            if other.course_id != slot.course_id and (slot.course_id, slot.pk) < (other.course_id, other.pk):
+                pairs.append((slot, other))
+    return pairs
+
+
+def weekly_grid(slots, first_hour=8, last_hour=18):
+    """
+    Rows of (hour label, [cell per weekday]) for a weekly timetable. Each cell lists the
+    slots occupying that hour; weekend columns only appear when used.
+    """
+    slots = list(slots)
+    days = 7 if any(slot.weekday >= 5 for slot in slots) else 5
+    if slots:
+        first_hour = min(first_hour, min(slot.start_time.hour for slot in slots))
+        last_hour = max(last_hour, max(slot.end_time.hour + (1 if slot.end_time.minute else 0) for slot in slots))
+    tree = IntervalTree((*week_minutes(slot), slot) for slot in slots)
+    rows = []
+    for hour in range(first_hour, last_hour):
+        cells = []
+        for weekday in range(days):
+            start = weekday * MINUTES_PER_DAY + hour * 60
+            cells.append(sorted(tree.overlapping(start, start + 60), key=lambda s: s.start_time))
+        rows.append((f'{hour:02}:00', cells))
+    return DAYS[:days], rows
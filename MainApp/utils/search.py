@@ -0,0 +1,140 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from MainApp.models import Course, SearchDocument, StudentProfile, User
+
+SEARCH_LIMIT = 1000
+FTS_TABLE = 'MainApp_searchdocument_fts'
+_TERM = re.compile(r'\w+', re.UNICODE)
+_fts_tables = {}
+
+
+def course_content(course):
+    return ' '.join(filter(None, (course.code, course.name, course.description)))
+
+
+def student_content(user, full_name=None):
+    return ' '.join(filter(None, (user.username, full_name)))
+
+
+def index_object(kind, object_id, content):
+    SearchDocument.objects.update_or_create(kind=kind, object_id=object_id, defaults={'content': content})
+
+
+def unindex_object(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every course and student; used after bulk loads that bypass signals."""
+    SearchDocument.objects.all().delete()
+    full_names = dict(StudentProfile.objects.values_list('user_id', 'full_name'))
+    SearchDocument.objects.bulk_create(
+        (SearchDocument(kind='course', object_id=c.pk, content=course_content(c))
+         for c in Course.objects.only('code', 'name', 'description').iterator(chunk_size=batch_size)),
+        batch_size=batch_size,
+    )
+    SearchDocument.objects.bulk_create(
+        (SearchDocument(kind='student', object_id=u.pk, content=student_content(u, full_names.get(u.pk)))
+         for u in User.objects.filter(role='student').only('username').iterator(chunk_size=batch_size)),
+        batch_size=batch_size,
+    )
+    return SearchDocument.objects.count()
+
+
+def search_ids(kind, query, limit=SEARCH_LIMIT):
+    """
+    Object ids of ``kind`` matching every word of ``query`` as a prefix, best match first.
+    Uses FTS5 on SQLite and tsvector/trigram GIN indexes on PostgreSQL.
+    """
+    terms = _TERM.findall(query.lower())
+    if not terms:
+        return []
+    connection = connections[router.db_for_read(SearchDocument)]
+    if connection.vendor == 'sqlite' and _has_fts(connection):
+        sql = (
+            f'SELECT d.object_id FROM "{FTS_TABLE}" f '
+            f'JOIN "MainApp_searchdocument" d ON d.id = f.rowid '
+            f'WHERE "{FTS_TABLE}" MATCH %s AND d.kind = %s ORDER BY bm25("{FTS_TABLE}") LIMIT %s'
+        )
+        params = [' '.join(f'"{term}"*' for term in terms), kind, limit]
+    elif connection.vendor == 'postgresql':
+        # The tsvector expression must match searchdocument_tsv_idx exactly to use the index;
+        # the trigram branch catches typos and infixes that prefix matching misses.
+        sql = (
+            "SELECT object_id FROM \"MainApp_searchdocument\" "
+            "WHERE kind = %s AND (to_tsvector('simple', content) @@ to_tsquery('simple', %s) OR content %% %s) "
+            "ORDER BY ts_rank(to_tsvector('simple', content), to_tsquery('simple', %s)) DESC, "
+            "similarity(content, %s) DESC LIMIT %s"
+        )
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        text = ' '.join(terms)
+        params = [kind, tsquery, text, tsquery, text, limit]
+    else:
+        documents = SearchDocument.objects.filter(kind=kind)
+        for term in terms:
+            documents = documents.filter(content__icontains=term)
+        return list(documents.values_list('object_id', flat=True)[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def matching(kind, query):
+    """
+    Unranked, unlimited queryset of the object ids ``search_ids`` would find, for use as a
+    subquery (``filter(student_id__in=matching('student', q))``) so no match is cut off.
+    """
+    terms = _TERM.findall(query.lower())
+    documents = SearchDocument.objects.filter(kind=kind)
+    if not terms:
+        return documents.none().values('object_id')
+    connection = connections[router.db_for_read(SearchDocument)]
+    if connection.vendor == 'sqlite' and _has_fts(connection):
+        documents = documents.filter(id__in=RawSQL(
+            f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s',
+            [' '.join(f'"{term}"*' for term in terms)],
+        ))
+    elif connection.vendor == 'postgresql':
+        documents = documents.filter(RawSQL(
+            "to_tsvector('simple', content) @@ to_tsquery('simple', %s) OR content %% %s",
+            [' & '.join(f'{term}:*' for term in terms), ' '.join(terms)],
+            output_field=BooleanField(),
+        ))
+    else:
+        for term in terms:
+            documents = documents.filter(content__icontains=term)
+    return documents.values('object_id')
+
+
+def ranked(queryset, ids):
+    """Objects of ``queryset`` with the given ids, in the order of ``ids``."""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+async def asearch_ids(kind, query, limit=SEARCH_LIMIT):
+    # Raw cursors have no async API, so the search runs on the ORM's sync thread
+    return await sync_to_async(search_ids)(kind, query, limit)
+
+
+async def amatching(kind, query):
+    # Looking up the FTS table can query the database, which async code may not do directly
+    return await sync_to_async(matching)(kind, query)
+
+
+async def aranked(queryset, ids):
+    objects = await queryset.ain_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def _has_fts(connection):
+    # The FTS table is only created when SQLite was compiled with FTS5
+    if connection.alias not in _fts_tables:
+        _fts_tables[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[connection.alias]
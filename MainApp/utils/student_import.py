@@ -0,0 +1,210 @@
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from MainApp.models import SearchDocument, StudentProfile, User
+from MainApp.utils.encryption import encrypt_text
+from MainApp.utils.sanitize import sanitize_rows
+from MainApp.utils.search import student_content
+
+REQUIRED_COLUMNS = ('username', 'full_name', 'age', 'contact_number', 'address', 'guardian_email')
+OPTIONAL_COLUMNS = ('email', 'password')
+DEFAULT_CHUNK_SIZE = 1000
+_SANITIZED = ('full_name', 'contact_number', 'address', 'guardian_email')
+_MAX_LENGTHS = {'username': 150, 'email': 254, 'full_name': 100, 'contact_number': 20, 'guardian_email': 254}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # (line number, username, message)
+
+    def error(self, line, row, message):
+        self.errors.append((line, row.get('username', ''), message))
+
+    def write_errors(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(['line', 'username', 'error'])
+        writer.writerows(self.errors)
+
+
+def import_students(stream, chunk_size=DEFAULT_CHUNK_SIZE, processes=None, dry_run=False, validate_passwords=True):
+    """
+    Create students (User + StudentProfile) from a CSV text stream, one transaction per
+    chunk of rows. Rows that fail validation are reported and skipped; the rest of their
+    chunk is still imported. Passwords are hashed in a pool of ``processes`` processes
+    (CPU count if None, this process if 0); rows without a password get an unusable one
+    and can use password reset. Raises ValueError for a missing column or malformed CSV.
+    """
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+
+    report = ImportReport()
+    seen = set()
+    pool = nullcontext() if processes == 0 else ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+    with pool:
+        chunk = []
+        # Line 1 is the header
+        try:
+            for line, row in enumerate(reader, start=2):
+                chunk.append((line, row))
+                if len(chunk) >= chunk_size:
+                    _import_chunk(chunk, seen, pool, report, dry_run, validate_passwords)
+                    chunk = []
+        except csv.Error as exc:
+            raise ValueError(f"Malformed CSV at line {reader.line_num}: {exc}") from None
+        if chunk:
+            _import_chunk(chunk, seen, pool, report, dry_run, validate_passwords)
+    return report
+
+
+def import_students_file(uploaded_file, max_password_rows=None, **kwargs):
+    """
+    import_students() for an uploaded file, hashing in this process unless ``processes``
+    is given. The whole file is decoded and parsed first, so an undecodable or malformed
+    file, or one with more than ``max_password_rows`` passwords to hash, raises
+    UnicodeDecodeError or ValueError before anyone is created.
+    """
+    text = uploaded_file.read().decode('utf-8-sig')
+    reader = csv.DictReader(io.StringIO(text, newline=''))
+    try:
+        with_password = sum(1 for row in reader if (row.get('password') or '').strip())
+    except csv.Error as exc:
+        raise ValueError(f"Malformed CSV at line {reader.line_num}: {exc}") from None
+    if max_password_rows is not None and with_password > max_password_rows:
+        raise ValueError(
+            f"{with_password} rows have a password, but at most {max_password_rows} can be hashed here; "
+            "import this file with `manage.py import_students`."
+        )
+    kwargs.setdefault('processes', 0)
+    return import_students(io.StringIO(text, newline=''), **kwargs)
+
+
+def _init_worker():
+    # Spawned workers (macOS, Windows) start without Django configured; forked ones already are
+    if not apps.ready:
+        django.setup()
+
+
+def _import_chunk(chunk, seen, pool, report, dry_run, validate_passwords):
+    valid = []
+    for line, row in chunk:
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        try:
+            cleaned = _clean_row(row, validate_passwords)
+        except ValidationError as exc:
+            report.error(line, row, '; '.join(exc.messages))
+            continue
+        if cleaned['username'] in seen:
+            report.error(line, row, "Duplicate username in file.")
+            continue
+        seen.add(cleaned['username'])
+        valid.append((line, cleaned))
+
+    # One query per chunk for usernames that are already taken
+    taken = set(User.objects.filter(username__in=[c['username'] for _, c in valid]).values_list('username', flat=True))
+    for line, cleaned in valid:
+        if cleaned['username'] in taken:
+            report.error(line, cleaned, "Username already exists.")
+    valid = [(line, cleaned) for line, cleaned in valid if cleaned['username'] not in taken]
+    if dry_run:
+        report.created += len(valid)
+        return
+    if not valid:
+        return
+
+    # Sanitized as a batch, and only for rows that will be written
+    sanitize_rows([cleaned for _, cleaned in valid], _SANITIZED)
+    hashes = _hash_passwords([c['password'] for _, c in valid], pool)
+    try:
+        _insert(valid, hashes)
+    except IntegrityError:
+        # A username was registered between the check and the insert; report the chunk
+        for line, cleaned in valid:
+            report.error(line, cleaned, "Chunk rolled back: a username was taken during the import.")
+        return
+    report.created += len(valid)
+
+
+def _hash_passwords(passwords, pool):
+    # PBKDF2 dominates import time, so it is the only step spread across processes
+    given = [password for password in passwords if password]
+    if not given:
+        hashed = iter(())
+    elif isinstance(pool, ProcessPoolExecutor):
+        hashed = iter(pool.map(make_password, given, chunksize=max(len(given) // 32, 1)))
+    else:
+        hashed = map(make_password, given)
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+def _clean_row(row, validate_passwords):
+    errors = []
+    for column in REQUIRED_COLUMNS:
+        if not row.get(column):
+            errors.append(f"{column} is required.")
+    for column, limit in _MAX_LENGTHS.items():
+        if len(row.get(column, '')) > limit:
+            errors.append(f"{column} is longer than {limit} characters.")
+    if errors:
+        raise ValidationError(errors)
+
+    try:
+        User.username_validator(row['username'])
+        age = int(row['age'])
+        if age < 1:
+            raise ValueError
+    except ValueError:
+        raise ValidationError("age must be a positive whole number.")
+    for column in ('email', 'guardian_email'):
+        if row.get(column):
+            try:
+                validate_email(row[column])
+            except ValidationError:
+                raise ValidationError(f"{column} is not a valid email address.")
+
+    cleaned = {
+        'username': row['username'],
+        'email': row.get('email', ''),
+        'password': row.get('password', ''),
+        'age': age,
+        **{column: row[column] for column in _SANITIZED},
+    }
+    if cleaned['password'] and validate_passwords:
+        validate_password(cleaned['password'], User(username=cleaned['username'], email=cleaned['email']))
+    return cleaned
+
+
+def _insert(valid, hashes):
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(username=c['username'], email=c['email'], password=password, role='student')
+            for (_, c), password in zip(valid, hashes)
+        )
+        StudentProfile.objects.bulk_create(
+            StudentProfile(
+                user=user,
+                full_name=c['full_name'],
+                age=c['age'],
+                contact_number=c['contact_number'],
+                address_encrypted=encrypt_text(c['address']),
+                guardian_email=c['guardian_email'],
+            )
+            for user, (_, c) in zip(users, valid)
+        )
+        # bulk_create skips the signals that index new students for search
+        SearchDocument.objects.bulk_create(
+            SearchDocument(kind='student', object_id=user.pk, content=student_content(user, c['full_name']))
+            for user, (_, c) in zip(users, valid)
+        )
@@ -0,0 +1,145 @@
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from MainApp.utils.dashboard import invalidate_dashboards
+
+logger = logging.getLogger(__name__)
+
+# Model fields that get derivatives, per model name
+THUMBNAIL_FIELDS = {
+    'studentprofile': ('profile_picture', 'transcript', 'id_proof'),
+    'teacherprofile': ('profile_picture',),
+}
+
+_executor = None
+
+
+def thumbnail_name(name, size):
+    """Derivatives sit next to the original: profile_pics/me.png -> profile_pics/me.thumb-small.jpg"""
+    return f'{os.path.splitext(name)[0]}.thumb-{size}.jpg'
+
+
+def thumbnail_url(file, size):
+    """URL of a generated thumbnail of ``file``, or None if there is none (yet)."""
+    if not file:
+        return None
+    name = thumbnail_name(file.name, size)
+    return default_storage.url(name) if default_storage.exists(name) else None
+
+
+def generate_thumbnails(storage, name):
+    """
+    Write every THUMBNAIL_SIZES derivative of the stored file ``name`` that is missing.
+    PDFs get a preview of their first page when poppler's pdftoppm is installed. Returns
+    the number of files written.
+    """
+    missing = {
+        size: thumbnail_name(name, size) for size in settings.THUMBNAIL_SIZES
+        if not default_storage.exists(thumbnail_name(name, size))
+    }
+    if not missing:
+        return 0
+    try:
+        image = _open_pdf_page(storage, name) if name.lower().endswith('.pdf') else _open_image(storage, name)
+    except (OSError, subprocess.SubprocessError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Could not create thumbnails for %s: %s", name, exc)
+        return 0
+    if image is None:
+        return 0
+    with image:
+        image = _flatten(ImageOps.exif_transpose(image))
+        for size, thumb in missing.items():
+            pixels = settings.THUMBNAIL_SIZES[size]
+            copy = image.copy()
+            copy.thumbnail((pixels, pixels))
+            buffer = io.BytesIO()
+            copy.save(buffer, 'JPEG', quality=80, optimize=True, progressive=True)
+            default_storage.save(thumb, ContentFile(buffer.getvalue()))
+    return len(missing)
+
+
+def delete_thumbnails(name):
+    for size in settings.THUMBNAIL_SIZES:
+        default_storage.delete(thumbnail_name(name, size))
+
+
+def schedule_thumbnails(instance, fields):
+    """Generate derivatives for ``fields`` of ``instance`` after the transaction commits."""
+    jobs = [(getattr(instance, field).storage, getattr(instance, field).name) for field in fields]
+    jobs = [(storage, name) for storage, name in jobs if name]
+    if not jobs:
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: _submit(_run_jobs, jobs, user_id))
+
+
+def _submit(fn, *args):
+    global _executor
+    if not settings.THUMBNAIL_ASYNC:
+        return fn(*args)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    _executor.submit(fn, *args)
+
+
+def _run_jobs(jobs, user_id):
+    try:
+        written = sum(generate_thumbnails(storage, name) for storage, name in jobs)
+        if written:
+            # Cached dashboards still point at the full-size picture
+            invalidate_dashboards([user_id])
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", [name for _, name in jobs])
+    finally:
+        if settings.THUMBNAIL_ASYNC:
+            close_old_connections()
+
+
+def _open_image(storage, name):
+    with storage.open(name) as handle:
+        image = Image.open(io.BytesIO(handle.read()))
+        # JPEG can decode at a fraction of full size, which is all a thumbnail needs
+        largest = max(settings.THUMBNAIL_SIZES.values())
+        image.draft('RGB', (largest * 2, largest * 2))
+        image.load()
+        return image
+
+
+def _open_pdf_page(storage, name):
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm is None:
+        return None
+    largest = max(settings.THUMBNAIL_SIZES.values())
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'source.pdf')
+        with storage.open(name) as handle, open(source, 'wb') as out:
+            shutil.copyfileobj(handle, out)
+        subprocess.run(
+            [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to', str(largest * 2),
+             source, os.path.join(workdir, 'page')],
+            check=True, timeout=30, capture_output=True,
+        )
+        with Image.open(os.path.join(workdir, 'page.png')) as page:
+            page.load()
+            return page.copy()
+
+
+def _flatten(image):
+    # JPEG has no alpha channel; transparent areas become white
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
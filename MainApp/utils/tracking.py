@@ -0,0 +1,71 @@
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+
+
+class TrackedFieldsMixin:
+    """
+    Remembers the column values an instance was loaded or last saved with. save() on an
+    existing row then writes only the changed columns (plus auto_now ones), and skips the
+    query entirely when nothing changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _remember_values(self):
+        # Deferred fields are not in __dict__ and are left out
+        self._saved_values = {
+            field.name: _comparable(field, self.__dict__[field.attname])
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        previous = getattr(self, '_saved_values', {})
+        self._remember_values()
+        if fields is not None:
+            # Fields that were not reloaded keep their pending changes
+            reloaded = {self._meta.get_field(name).name for name in fields}
+            self._saved_values = {
+                **{name: value for name, value in previous.items() if name not in reloaded},
+                **{name: self._saved_values[name] for name in reloaded if name in self._saved_values},
+            }
+
+    def saved_value(self, name, default=None):
+        """
+        Value of ``name`` as loaded or last saved (file fields give the file name). Inside
+        pre_save and post_save handlers this is still the value before the current save.
+        """
+        return getattr(self, '_saved_values', {}).get(name, default)
+
+    def changed_fields(self):
+        """Names of fields changed since load or the last save; None for an unsaved instance."""
+        saved = getattr(self, '_saved_values', None)
+        if self._state.adding or saved is None:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (field.name not in saved or _comparable(field, self.__dict__[field.attname]) != saved[field.name])
+        }
+
+    def save(self, *args, **kwargs):
+        changed = self.changed_fields()
+        if changed is not None and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # An empty update_fields makes Django skip the save, including its signals
+            auto_now = {field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)}
+            kwargs['update_fields'] = changed | auto_now if changed else []
+        super().save(*args, **kwargs)
+        self._remember_values()
+
+
+def _comparable(field, value):
+    if isinstance(field, FileField):
+        if isinstance(value, FieldFile):
+            # A new upload is a change even if it happens to reuse the stored name
+            return (value.name or None) if value._committed else object()
+        return value or None
+    return value
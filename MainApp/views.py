@@ -1,23 +1,50 @@
 import logging
-from django.shortcuts import render, redirect
+import os
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render, redirect
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django_ratelimit.decorators import ratelimit
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Q
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings
+from django.views.decorators.http import require_POST, require_safe
+
+from .utils.dashboard import dashboard_context
+from .utils.dbpool import pool_stats
+from .utils.enrollment import review_enrollments
+from .utils.exports import export_response
+from .utils.media import can_view_media, serve_file
+from .utils.pagination import akeyset_page, keyset_page
+from .utils.prerequisites import missing_prerequisites
+from .utils.ratelimit import ratelimit
+from .utils.schedule import conflicting_slots, weekly_grid
+from .utils.search import amatching, aranked, asearch_ids
 
-from .forms import StudentRegistrationForm, TeacherRegistrationForm, StudentProfileForm, TeacherProfileForm
-from .models import User, StudentProfile, TeacherProfile, Course, Enrollment
+from .forms import StudentRegistrationForm, TeacherRegistrationForm, StudentProfileForm, TeacherProfileForm, EnrollmentExportForm
+from .models import User, Course, CourseFull, Enrollment, ScheduleSlot
+from .routers import primary_only
+from .storage import document_storage
 
 
 # Logger for rate-limited events
 logger = logging.getLogger('ratelimit')
 
+SEARCH_RESULTS_PER_PAGE = 50
+
+
+# Course browsing, enrollment and review are async views so they do not hold a worker
+# while waiting on the database under ASGI; anything transactional is handed to
+# sync_to_async as one unit. Under WSGI Django runs them through async_to_sync.
+async def _auser(request):
+    # Resolve the user on the async path and pin it, so templates reading request.user
+    # do not fall back to a synchronous database lookup
+    request.user = await request.auser()
+    return request.user
+
 
 # ----------------------------
 # Home Page
@@ -29,11 +56,11 @@ def home(request):
 # ----------------------------
 # Student Registration
 # ----------------------------
-@ratelimit(key='ip', rate='3/m', block=True)
+@ratelimit(key='ip', rate='3/m')
 def register_student(request):
     if getattr(request, 'limited', False):
         ip = request.META.get('REMOTE_ADDR')
-        logger.warning(f"Rate limit exceeded on student registration by IP: {ip}")
+        logger.warning("Rate limit exceeded on student registration by IP: %s", ip, extra={'ip': ip})
         return HttpResponse("Too many registration attempts. Try again later.", status=429)
 
     if request.method == 'POST':
@@ -53,11 +80,11 @@ def register_student(request):
 # ----------------------------
 # Teacher Registration
 # ----------------------------
-@ratelimit(key='ip', rate='3/m', block=True)
+@ratelimit(key='ip', rate='3/m')
 def register_teacher(request):
     if getattr(request, 'limited', False):
         ip = request.META.get('REMOTE_ADDR')
-        logger.warning(f"Rate limit exceeded on teacher registration by IP: {ip}")
+        logger.warning("Rate limit exceeded on teacher registration by IP: %s", ip, extra={'ip': ip})
         return HttpResponse("Too many registration attempts. Try again later.", status=429)
 
     if request.method == 'POST':
@@ -77,11 +104,11 @@ def register_teacher(request):
 # ----------------------------
 # Login View
 # ----------------------------
-@ratelimit(key='ip', rate='5/m', block=True)
+@ratelimit(key='ip', rate='5/m')
 def login_view(request):
     if getattr(request, 'limited', False):
         ip = request.META.get('REMOTE_ADDR')
-        logger.warning(f"Rate limit exceeded on login by IP: {ip}")
+        logger.warning("Rate limit exceeded on login by IP: %s", ip, extra={'ip': ip})
         return HttpResponse("Too many login attempts. Try again later.", status=429)
 
     if request.user.is_authenticated:
@@ -116,47 +143,22 @@ def logout_view(request):
 @login_required
 def dashboard(request):
     role = request.user.role
-    logger.info(f"Dashboard accessed by user {request.user.username} with role {role}")
-    
-    if role == 'student':
-        # Check if user has a profile, if not create one or handle gracefully
-        try:
-            profile = request.user.student_profile
-            logger.info(f"Student profile found for {request.user.username}")
-        except Exception as e:
-            logger.warning(f"No student profile found for {request.user.username}, creating one. Error: {e}")
-            # If no profile exists, create a basic one
-            profile = StudentProfile.objects.create(
-                user=request.user,
-                full_name=request.user.get_full_name() or request.user.username,
-                age=18,  # Default age
-                contact_number="",
-                address_encrypted="",
-                guardian_email=request.user.email or "",
-            )
-        return render(request, 'dashboard/student_dashboard.html', {'profile': profile})
-    elif role == 'teacher':
-        try:
-            profile = request.user.teacher_profile
-            logger.info(f"Teacher profile found for {request.user.username}")
-        except Exception as e:
-            logger.warning(f"No teacher profile found for {request.user.username}, creating one. Error: {e}")
-            # If no profile exists, create a basic one
-            profile = TeacherProfile.objects.create(
-                user=request.user,
-                full_name=request.user.get_full_name() or request.user.username,
-                department="",
-                contact_email=request.user.email or "",
-                office_location="",
-                bio="",
-            )
-        return render(request, 'dashboard/teacher_dashboard.html', {'profile': profile})
-    elif role == 'admin':
-        return render(request, 'dashboard/admin_dashboard.html')
-    else:
+    logger.debug("Dashboard accessed by user %s with role %s", request.user.username, role)
+    templates = {
+        'student': 'dashboard/student_dashboard.html',
+        'teacher': 'dashboard/teacher_dashboard.html',
+        'admin': 'dashboard/admin_dashboard.html',
+    }
+    if role not in templates:
         messages.error(request, "Unauthorized role.")
         return redirect('login')
-    
+    context, version = dashboard_context(request.user)
+    return render(request, templates[role], {
+        **context,
+        'dashboard_version': version,
+        'dashboard_cache_timeout': settings.DASHBOARD_CACHE_TIMEOUT,
+    })
+
 from .forms import StudentProfileForm, TeacherProfileForm
 
 @login_required
@@ -198,92 +200,129 @@ def view_transcript(request):
         return redirect('dashboard')
     return render(request, 'profiles/view_transcript.html', {'profile': profile})
 
+# ----------------------------
+# Protected Media
+# ----------------------------
+@require_safe
 @login_required
-def course_list(request):
-    courses = Course.objects.all()
-    return render(request, 'courses/course_list.html', {'courses': courses})
+def protected_media(request, path):
+    # 404 rather than 403, so other users' file names cannot be confirmed
+    if not can_view_media(request.user, path):
+        raise Http404("File not found.")
+    return serve_file(request, default_storage, path, immutable=path.startswith(document_storage.prefix + '/'))
 
 @login_required
-def course_detail(request, course_id):
-    course = Course.objects.get(id=course_id)
-    already_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    can_enroll = not already_enrolled and course.capacity > course.enrollments.filter(status='approved').count()
+async def course_list(request):
+    await _auser(request)
+    query = request.GET.get('q', '').strip()
+    courses = Course.objects.select_related('teacher')
+    if query:
+        # Ranked results replace the paginated listing while searching
+        courses = await aranked(courses, await asearch_ids('course', query, limit=SEARCH_RESULTS_PER_PAGE))
+    else:
+        courses = await akeyset_page(request, courses, ('code',))
+    return render(request, 'courses/course_list.html', {'courses': courses, 'query': query})
+
+@login_required
+async def course_detail(request, course_id):
+    user = await _auser(request)
+    course = await aget_object_or_404(
+        Course.objects.select_related('teacher').prefetch_related('prerequisites'), id=course_id,
+    )
+    enrollment = await Enrollment.objects.filter(student=user, course=course).afirst()
+    already_enrolled = enrollment is not None
+    can_enroll = not already_enrolled and course.seats_available > 0
     error = None
     if request.method == 'POST' and can_enroll:
-        # Check prerequisites
-        missing = [pr for pr in course.prerequisites.all() if not Enrollment.objects.filter(student=request.user, course=pr, status='approved').exists()]
+        # Check prerequisites, including transitive ones
+        missing = [pr async for pr in missing_prerequisites(user, course)]
+        clashes = [slot async for slot in conflicting_slots(course, Course.objects.filter(
+            enrollments__student=user, enrollments__status__in=['pending', 'approved']))]
         if missing:
             error = 'Missing prerequisites: ' + ', '.join([pr.name for pr in missing])
+        elif clashes:
+            error = 'Schedule conflict with ' + ', '.join(str(slot) for slot in clashes)
         else:
-            Enrollment.objects.create(student=request.user, course=course)
+            await Enrollment.objects.acreate(student=user, course=course)
             return redirect('course_detail', course_id=course.id)
     return render(request, 'courses/course_detail.html', {
         'course': course,
         'already_enrolled': already_enrolled,
         'can_enroll': can_enroll,
         'error': error,
-        'enrollment': Enrollment.objects.filter(student=request.user, course=course).first(),
+        'enrollment': enrollment,
     })
 
+@primary_only
 @login_required
-def admin_enrollment_requests(request):
-    if not request.user.is_authenticated or request.user.role != 'admin':
+async def admin_enrollment_requests(request):
+    user = await _auser(request)
+    if user.role != 'admin':
         return redirect('dashboard')
+    if request.method == 'POST':
+        enrollment_id = request.POST.get('enrollment_id')
+        action = request.POST.get('action')
+        note = request.POST.get('note', '')
+        await _areview(request, Enrollment.objects.all(), [enrollment_id], action, note, 'admin')
+        return redirect('admin_enrollment_requests')
     # Filtering logic
     student_query = request.GET.get('student', '').strip()
     course_query = request.GET.get('course', '').strip()
     pending = Enrollment.objects.filter(status='pending').select_related('student', 'course')
     if student_query:
-        pending = pending.filter(student__username__icontains=student_query)
+        pending = pending.filter(student_id__in=await amatching('student', student_query))
     if course_query:
-        pending = pending.filter(course__name__icontains=course_query)
-    if request.method == 'POST':
-        enrollment_id = request.POST.get('enrollment_id')
-        action = request.POST.get('action')
-        note = request.POST.get('note', '')
-        try:
-            enrollment = Enrollment.objects.get(id=enrollment_id, status='pending')
-            if action == 'approve':
-                enrollment.status = 'approved'
-                decision = 'approved'
-            elif action == 'deny':
-                enrollment.status = 'denied'
-                decision = 'denied'
-            else:
-                decision = None
-            enrollment.reviewed_by = request.user
-            enrollment.reviewed_at = timezone.now()
-            enrollment.note = note
-            enrollment.save()
-            # Send email notification to student
-            if decision:
-                subject = f"Enrollment {decision.title()} for {enrollment.course.name}"
-                message = f"Dear {enrollment.student.username},\n\nYour enrollment request for {enrollment.course.name} has been {decision}."
-                if note:
-                    message += f"\n\nNote from admin: {note}"
-                message += "\n\nThank you."
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [enrollment.student.email], fail_silently=True)
-        except Enrollment.DoesNotExist:
-            pass
-        return redirect('admin_enrollment_requests')
+        pending = pending.filter(course_id__in=await amatching('course', course_query))
     return render(request, 'admin/enrollment_requests.html', {
-        'pending': pending,
+        'pending': await akeyset_page(request, pending, ('requested_at', 'id')),
         'student_query': student_query,
         'course_query': course_query,
+        'export_courses': [course async for course in Course.objects.order_by('code').only('id', 'code', 'name')],
+        'export_statuses': Enrollment.STATUS_CHOICES,
     })
 
+ENROLLMENT_COLUMNS = [
+    ("ID", lambda e: e.pk),
+    ("Username", lambda e: e.student.username),
+    ("Full name", lambda e: _profile_value(e.student, 'full_name')),
+    ("Email", lambda e: e.student.email),
+    ("Course code", lambda e: e.course.code),
+    ("Course name", lambda e: e.course.name),
+    ("Status", lambda e: e.get_status_display()),
+    ("Requested", lambda e: e.requested_at),
+    ("Reviewed", lambda e: e.reviewed_at),
+    ("Reviewed by", lambda e: e.reviewed_by.username if e.reviewed_by else ''),
+    ("Note", lambda e: e.note),
+]
+
+@login_required
+def enrollment_export(request, fmt):
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    form = EnrollmentExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponse(form.errors.as_text(), content_type='text/plain', status=400)
+    enrollments = form.filter(
+        Enrollment.objects.select_related('student', 'student__student_profile', 'course', 'reviewed_by')
+    ).order_by('id')
+    return export_response(request, enrollments, ENROLLMENT_COLUMNS, 'enrollments', fmt, sheet_name='Enrollments')
+
 @login_required
-def student_schedule(request):
-    if not request.user.is_authenticated or request.user.role != 'student':
+async def student_schedule(request):
+    user = await _auser(request)
+    if user.role != 'student':
         return redirect('dashboard')
-    enrollments = Enrollment.objects.filter(student=request.user, status='approved').select_related('course')
-    return render(request, 'dashboard/student_schedule.html', {'enrollments': enrollments})
+    enrollments = [
+        e async for e in Enrollment.objects.filter(student=user, status='approved').select_related('course', 'course__teacher')
+    ]
+    slots = ScheduleSlot.objects.filter(course__enrollments__student=user, course__enrollments__status='approved').select_related('course')
+    weekdays, grid = weekly_grid([slot async for slot in slots])
+    return render(request, 'dashboard/student_schedule.html', {'enrollments': enrollments, 'weekdays': weekdays, 'grid': grid})
 
 @login_required
 def teacher_dashboard(request):
     if not request.user.is_authenticated or request.user.role != 'teacher':
         return redirect('dashboard')
-    courses = Course.objects.filter(teacher=request.user)
     selected_course = None
     students = None
     message = None
@@ -294,22 +333,29 @@ def teacher_dashboard(request):
             selected_course = Course.objects.get(id=course_id, teacher=request.user)
             student = User.objects.get(username=student_username, role='student')
             # Check if already enrolled
+            clashes = list(conflicting_slots(selected_course, Course.objects.filter(
+                enrollments__student=student, enrollments__status='approved')))
             if Enrollment.objects.filter(student=student, course=selected_course).exists():
                 message = f"{student.username} is already enrolled or has a pending request."
-            elif selected_course.capacity <= Enrollment.objects.filter(course=selected_course, status='approved').count():
-                message = "No seats available in this course."
+            elif clashes:
+                message = f"{student.username} has a schedule conflict with " + ', '.join(str(slot) for slot in clashes)
             else:
                 Enrollment.objects.create(student=student, course=selected_course, status='approved', reviewed_by=request.user, reviewed_at=timezone.now())
                 message = f"{student.username} has been enrolled in {selected_course.name}."
         except (Course.DoesNotExist, User.DoesNotExist):
             message = "Invalid course or student."
+        except CourseFull:
+            message = "No seats available in this course."
     if selected_course:
         students = Enrollment.objects.filter(course=selected_course, status='approved').select_related('student')
+    context, version = dashboard_context(request.user)
     return render(request, 'dashboard/teacher_dashboard.html', {
-        'courses': courses,
+        **context,
         'selected_course': selected_course,
         'students': students,
         'message': message,
+        'dashboard_version': version,
+        'dashboard_cache_timeout': settings.DASHBOARD_CACHE_TIMEOUT,
     })
 
 @login_required
@@ -327,42 +373,102 @@ def teacher_course_students(request, course_id):
         course = Course.objects.get(id=course_id, teacher=request.user)
     except Course.DoesNotExist:
         return redirect('teacher_courses')
-    enrollments = Enrollment.objects.filter(course=course, status='approved').select_related('student')
+    enrollments = keyset_page(request, Enrollment.objects.filter(course=course, status='approved').select_related('student'), ('id',))
     return render(request, 'courses/teacher_course_students.html', {'course': course, 'enrollments': enrollments})
 
+def _profile_value(user, field):
+    # Students registered before profiles were required may not have one
+    profile = getattr(user, 'student_profile', None)
+    return getattr(profile, field, '') if profile else ''
+
+ROSTER_COLUMNS = [
+    ("Username", lambda e: e.student.username),
+    ("Full name", lambda e: _profile_value(e.student, 'full_name')),
+    ("Email", lambda e: e.student.email),
+    ("Contact number", lambda e: _profile_value(e.student, 'contact_number')),
+    ("Requested", lambda e: e.requested_at),
+    ("Approved", lambda e: e.reviewed_at),
+]
+
 @login_required
-def teacher_pending_enrollments(request):
-    if not request.user.is_authenticated or request.user.role != 'teacher':
+def teacher_course_students_export(request, course_id, fmt):
+    if request.user.role != 'teacher':
+        return redirect('dashboard')
+    try:
+        course = Course.objects.get(id=course_id, teacher=request.user)
+    except Course.DoesNotExist:
+        return redirect('teacher_courses')
+    enrollments = (
+        Enrollment.objects.filter(course=course, status='approved')
+        .select_related('student', 'student__student_profile')
+        .order_by('id')
+    )
+    return export_response(request, enrollments, ROSTER_COLUMNS, f'{course.code}-roster', fmt, sheet_name=course.code)
+
+@primary_only
+@login_required
+async def teacher_pending_enrollments(request):
+    user = await _auser(request)
+    if user.role != 'teacher':
         return redirect('dashboard')
-    courses = Course.objects.filter(teacher=request.user)
-    pending = Enrollment.objects.filter(course__in=courses, status='pending').select_related('student', 'course')
     if request.method == 'POST':
         enrollment_id = request.POST.get('enrollment_id')
         action = request.POST.get('action')
         note = request.POST.get('note', '')
-        try:
-            enrollment = Enrollment.objects.get(id=enrollment_id, status='pending', course__teacher=request.user)
-            if action == 'approve':
-                enrollment.status = 'approved'
-                decision = 'approved'
-            elif action == 'deny':
-                enrollment.status = 'denied'
-                decision = 'denied'
-            else:
-                decision = None
-            enrollment.reviewed_by = request.user
-            enrollment.reviewed_at = timezone.now()
-            enrollment.note = note
-            enrollment.save()
-            # Optionally, send email notification to student
-            if decision:
-                subject = f"Enrollment {decision.title()} for {enrollment.course.name}"
-                message = f"Dear {enrollment.student.username},\n\nYour enrollment request for {enrollment.course.name} has been {decision}."
-                if note:
-                    message += f"\n\nNote from teacher: {note}"
-                message += "\n\nThank you."
-                send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [enrollment.student.email], fail_silently=True)
-        except Enrollment.DoesNotExist:
-            pass
+        await _areview(request, Enrollment.objects.filter(course__teacher=user), [enrollment_id], action, note, 'teacher')
         return redirect('teacher_pending_enrollments')
-    return render(request, 'courses/teacher_pending_enrollments.html', {'pending': pending})
\ No newline at end of file
+    courses = Course.objects.filter(teacher=user)
+    pending = Enrollment.objects.filter(course__in=courses, status='pending').select_related('student', 'course')
+    student_query = request.GET.get('student', '').strip()
+    if student_query:
+        pending = pending.filter(student_id__in=await amatching('student', student_query))
+    return render(request, 'courses/teacher_pending_enrollments.html', {
+        'pending': await akeyset_page(request, pending, ('requested_at', 'id')),
+        'student_query': student_query,
+    })
+
+def _review(request, queryset, enrollment_ids, action, note, reviewer_label):
+    ids = [int(i) for i in enrollment_ids if i and str(i).isdigit()]
+    decided, skipped = review_enrollments(queryset, ids, action, request.user, note, reviewer_label)
+    if skipped:
+        messages.warning(request, f"{len(skipped)} request(s) not approved: course is full.")
+    return decided, skipped
+
+# The review runs in one transaction with row locks, so it stays a single sync unit
+_areview = sync_to_async(_review)
+
+@primary_only
+@login_required
+@require_POST
+async def bulk_enrollment_decision(request):
+    user = await _auser(request)
+    role = user.role
+    if role == 'admin':
+        queryset = Enrollment.objects.all()
+        redirect_to = 'admin_enrollment_requests'
+    elif role == 'teacher':
+        queryset = Enrollment.objects.filter(course__teacher=user)
+        redirect_to = 'teacher_pending_enrollments'
+    else:
+        return redirect('dashboard')
+    action = request.POST.get('action')
+    decided, skipped = await _areview(
+        request, queryset, request.POST.getlist('enrollment_ids'), action,
+        request.POST.get('note', ''), role,
+    )
+    if decided:
+        messages.success(request, f"{len(decided)} request(s) {decided[0].status}.")
+    elif not skipped:
+        messages.info(request, "No pending requests were selected.")
+    return redirect(redirect_to)
+
+
+# ----------------------------
+# Database Pool Metrics
+# ----------------------------
+@login_required
+def db_pool_metrics(request):
+    # Counters of the worker that served this request; repeat the request to sample others
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    return JsonResponse({'pid': os.getpid(), 'pools': pool_stats()})
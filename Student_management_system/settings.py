@@ -12,7 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 
@@ -46,14 +47,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "MainApp.middleware.RequestMetricsMiddleware",  # first, so its total covers the whole stack
     "django.middleware.security.SecurityMiddleware",
+    "MainApp.middleware.ReplicaStickinessMiddleware",  # before sessions, so it sees the session write
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",  # CSRF protection enabled
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'MainApp.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise that does not force ASGI requests onto a thread
 ]
 
 # Custom CSRF middleware for development
@@ -110,15 +113,73 @@ if all([DB_NAME, DB_USER, DB_PASSWORD, DB_HOST]):
             'PASSWORD': DB_PASSWORD,
             'HOST': DB_HOST,
             'PORT': DB_PORT or '5432',
+            # Health-checked before reuse, so a connection dropped by the server is replaced
+            'CONN_HEALTH_CHECKS': True,
+            # Needed behind pgbouncer in transaction mode, which cannot keep cursors open
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', cast=bool, default=False),
         }
     }
+    # Connection reuse. DB_POOL=True keeps a psycopg 3 pool of DB_POOL_MIN_SIZE to
+    # DB_POOL_MAX_SIZE connections in each gunicorn worker (WEB_CONCURRENCY x max size must
+    # stay below the server's max_connections). Otherwise DB_CONN_MAX_AGE keeps a thread's
+    # connection open that many seconds; that is WSGI only, as ASGI requests run on
+    # short-lived threads whose connections would never be reused or closed
+    SERVER_MODE = config('SERVER_MODE', default='wsgi').lower()
+    DB_POOL = config('DB_POOL', cast=bool, default=False)
+    DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', cast=int, default=0)
+    if DB_CONN_MAX_AGE and (DB_POOL or SERVER_MODE == 'asgi'):
+        raise ImproperlyConfigured("DB_CONN_MAX_AGE must be 0 with DB_POOL or SERVER_MODE=asgi.")
+    DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    if DB_POOL:
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', cast=int, default=1),
+                # A sync worker serves one request at a time; an ASGI worker runs many at once
+                'max_size': config('DB_POOL_MAX_SIZE', cast=int, default=8 if SERVER_MODE == 'asgi' else 2),
+                # Seconds a request waits for a free connection before failing
+                'timeout': config('DB_POOL_TIMEOUT', cast=float, default=10),
+                'max_idle': config('DB_POOL_MAX_IDLE', cast=float, default=300),
+                'check': ConnectionPool.check_connection,
+            },
+        }
+    # Read replicas, e.g. DB_REPLICA_HOSTS=replica1,replica2:5433, with the primary's
+    # database name and credentials unless DB_REPLICA_USER / DB_REPLICA_PASSWORD are set
+    DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', cast=Csv(), default='')
+    DB_REPLICA_USER = config('DB_REPLICA_USER', default=None)
+    DB_REPLICA_PASSWORD = config('DB_REPLICA_PASSWORD', default=None)
+    for number, replica in enumerate(DB_REPLICA_HOSTS, 1):
+        host, _, port = replica.partition(':')
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            'USER': DB_REPLICA_USER or DB_USER,
+            'PASSWORD': DB_REPLICA_PASSWORD or DB_PASSWORD,
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Writers wait for the lock instead of failing with "database is locked";
+            # IMMEDIATE takes it at BEGIN, so a read-then-write transaction cannot deadlock
+            'OPTIONS': {'timeout': config('SQLITE_TIMEOUT', default=20, cast=int), 'transaction_mode': 'IMMEDIATE'},
         }
     }
+    # Copies of db.sqlite3 to try replica routing locally, e.g. DB_REPLICA_FILES=replica.sqlite3
+    for number, replica in enumerate(config('DB_REPLICA_FILES', cast=Csv(), default=''), 1):
+        DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'NAME': BASE_DIR / replica}
+
+# Reads go to a replica unless MainApp.routers.ReplicaRouter pins them to the primary;
+# a client that wrote reads from the primary for REPLICA_STICKY_SECONDS afterwards. Tests
+# run replicas as mirrors of the test database
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['MainApp.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', cast=int, default=5)
 
 
 # Password validation
@@ -140,14 +201,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Handlers write on background threads (MainApp.utils.logs): a logging call only puts
+# the record on a queue of LOG_QUEUE_SIZE records, and drops it when the queue is full
+# rather than wait for a slow disk. Files are rotated externally (logrotate): every gunicorn
+# worker appends to the same file and reopens it once it has been moved
+LOGGING_CONFIG = 'MainApp.utils.logs.configure'
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', cast=int, default=10_000)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'MainApp.utils.logs.JsonFormatter',
+        },
+    },
     'handlers': {
         'ratelimit_file': {
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.WatchedFileHandler',
             'filename': BASE_DIR / 'logs/ratelimit.log',
+            'formatter': 'json',
         },
         'console': {
             'class': 'logging.StreamHandler',
@@ -159,15 +233,68 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        'MainApp.metrics': {
+            'handlers': ['console'],
+            'level': config('REQUEST_METRICS_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
     },
 }
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',  # For development
-        'LOCATION': 'unique-sms-cache',
+# Per-request query/timing instrumentation (MainApp.middleware.RequestMetricsMiddleware)
+# Fraction of requests measured; 0 turns the middleware into a pass-through
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', cast=float, default=1.0)
+# Warn when a view issues more queries than this; 0 disables the check
+REQUEST_METRICS_QUERY_BUDGET = config('REQUEST_METRICS_QUERY_BUDGET', cast=int, default=30)
+# Keep the raw SQL of sampled requests so budget warnings can list the statements
+REQUEST_METRICS_LOG_SQL = config('REQUEST_METRICS_LOG_SQL', cast=bool, default=False)
+
+# Shared across gunicorn workers: Redis when REDIS_URL is set, otherwise a database table
+# created with `python manage.py createcachetable`
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+# Sessions are read from the cache first when it is Redis (MainApp.sessions); the
+# database cache would only swap one query for another. Saves that change nothing but the
+# expiry reach the database every SESSION_DB_WRITE_INTERVAL seconds at most. Expired rows
+# are deleted SESSION_PURGE_BATCH_SIZE at a time by `manage.py purge_sessions`
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='MainApp.sessions' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
+SESSION_DB_WRITE_INTERVAL = config('SESSION_DB_WRITE_INTERVAL', cast=int, default=300)
+SESSION_PURGE_BATCH_SIZE = config('SESSION_PURGE_BATCH_SIZE', cast=int, default=1000)
+
+# Seconds a user's cached dashboard context and fragment live; signals invalidate earlier on change
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', cast=int, default=600)
+
+# Derivatives of profile pictures and documents, as name -> longest side in pixels. They
+# are generated after upload on THUMBNAIL_WORKERS background threads (inline when
+# THUMBNAIL_ASYNC is off); `manage.py generate_thumbnails` fills in any that are missing
+THUMBNAIL_SIZES = {'small': 100, 'medium': 240}
+THUMBNAIL_ASYNC = config('THUMBNAIL_ASYNC', cast=bool, default=True)
+THUMBNAIL_WORKERS = config('THUMBNAIL_WORKERS', cast=int, default=1)
+
+# Rate limits on login and registration (MainApp.utils.ratelimit) are counted in the
+# database, so all workers share them. Expired counters are deleted RATELIMIT_PURGE_BATCH_SIZE
+# rows at a time by a RATELIMIT_PURGE_PROBABILITY fraction of requests, or by
+# `manage.py purge_ratelimits`
+RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', cast=bool, default=True)
+RATELIMIT_PURGE_PROBABILITY = config('RATELIMIT_PURGE_PROBABILITY', cast=float, default=0.01)
+RATELIMIT_PURGE_BATCH_SIZE = config('RATELIMIT_PURGE_BATCH_SIZE', cast=int, default=1000)
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -199,6 +326,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media goes through MainApp.views.protected_media, which checks access. Set MEDIA_SENDFILE
+# to 'x-accel' (nginx, internal location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache mod_xsendfile) to let the web server send the file bytes
+MEDIA_SENDFILE = config('MEDIA_SENDFILE', default='')
+if MEDIA_SENDFILE not in ('', 'x-accel', 'x-sendfile'):
+    raise ImproperlyConfigured("MEDIA_SENDFILE must be '', 'x-accel' or 'x-sendfile'.")
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
 
 # for email configuration for notification
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -209,7 +343,19 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
+# Outbox worker (python manage.py send_queued_mail)
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', cast=int, default=100)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', cast=int, default=6)
+OUTBOX_RETRY_BASE_SECONDS = config('OUTBOX_RETRY_BASE_SECONDS', cast=int, default=60)
+OUTBOX_RETRY_MAX_SECONDS = config('OUTBOX_RETRY_MAX_SECONDS', cast=int, default=3600)
+OUTBOX_POLL_INTERVAL = config('OUTBOX_POLL_INTERVAL', cast=float, default=5.0)
+# Claimed rows are not picked up by another worker for this long; keep it above a batch's send time
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', cast=int, default=600)
+
+# AES-GCM key for StudentProfile.address_encrypted. To rotate, move the current value into
+# ENCRYPTION_OLD_KEYS (comma-separated), set a new key and run `manage.py rotate_encryption_key`
 ENCRYPTION_KEY = config('ENCRYPTION_KEY', default='development-encryption-key-change-in-production')
+ENCRYPTION_OLD_KEYS = config('ENCRYPTION_OLD_KEYS', cast=Csv(), default='')
 
 # CSRF and cookie security for production
 if not DEBUG:
@@ -20,11 +20,14 @@ from django.contrib import admin
 from django.urls import path, include
 from MainApp import views
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 
 urlpatterns = [
     path('', views.home, name='home'),  # Home page
+    # Must precede admin.site.urls, whose catch-all would otherwise swallow it
+    path('admin/enrollments/', views.admin_enrollment_requests, name='admin_enrollment_requests'),
+    path('admin/enrollments/export/<str:fmt>/', views.enrollment_export, name='enrollment_export'),
+    path('admin/metrics/db-pool/', views.db_pool_metrics, name='db_pool_metrics'),
     path('admin/', admin.site.urls),
 
     # Authentication
@@ -46,11 +49,13 @@ urlpatterns = [
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
 
     path('view-transcript/', views.view_transcript, name='view_transcript'),
+    # Every uploaded file, in development too, so access checks always apply
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', views.protected_media, name='protected_media'),
 
     path('courses/', views.course_list, name='course_list'),
     path('courses/<int:course_id>/', views.course_detail, name='course_detail'),
 
-    path('admin/enrollments/', views.admin_enrollment_requests, name='admin_enrollment_requests'),
+    path('enrollments/bulk-decision/', views.bulk_enrollment_decision, name='bulk_enrollment_decision'),
 
     path('my-schedule/', views.student_schedule, name='student_schedule'),
 
@@ -58,7 +63,5 @@ urlpatterns = [
     path('teacher/courses/', views.teacher_courses, name='teacher_courses'),
     path('teacher/courses/pending/', views.teacher_pending_enrollments, name='teacher_pending_enrollments'),
     path('teacher/courses/<int:course_id>/students/', views.teacher_course_students, name='teacher_course_students'),
+    path('teacher/courses/<int:course_id>/students/export/<str:fmt>/', views.teacher_course_students_export, name='teacher_course_students_export'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
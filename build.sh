@@ -12,6 +12,7 @@ python manage.py collectstatic --no-input
 if [ -n "$DB_NAME" ]; then
     echo "Database configured, running migrations..."
     python manage.py migrate
+    python manage.py createcachetable
 else
     echo "No database configured, skipping migrations..."
 fi 
\ No newline at end of file
@@ -0,0 +1,25 @@
+# gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE=wsgi (default) runs classic sync workers; SERVER_MODE=asgi runs the ASGI
+# application on uvicorn workers, where the async views serve many requests per worker.
+import multiprocessing
+
+# Every lowercase module-level name is read as a gunicorn setting, so decouple's
+# ``config`` must not be imported by name here
+import decouple
+
+SERVER_MODE = decouple.config('SERVER_MODE', default='wsgi').lower()
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'Student_management_system.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'Student_management_system.wsgi:application'
+    worker_class = 'sync'
+else:
+    raise RuntimeError(f"SERVER_MODE must be 'wsgi' or 'asgi', not {SERVER_MODE!r}")
+
+bind = f"0.0.0.0:{decouple.config('PORT', default='8000')}"
+workers = decouple.config('WEB_CONCURRENCY', cast=int, default=multiprocessing.cpu_count() * 2 + 1)
+timeout = decouple.config('GUNICORN_TIMEOUT', cast=int, default=30)
+accesslog = '-'